@@ -1,3 +1,119 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.core.models import (Author, Genre, Publishing, Book, Reader, Lending, Phone, Address,
+                              Branch, BranchHolding, BranchTransfer, Job,
+                              PurchaseSuggestion)
+from apps.core.paginators import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    ordering = ('-pk',)
+
+
+@admin.register(Author)
+class AuthorAdmin(LargeTableAdmin):
+    list_display = ('surname', 'first_name', 'last_name', 'birth_date', 'gender')
+    search_fields = ('surname', 'first_name', 'last_name')
+
+
+@admin.register(Genre)
+class GenreAdmin(LargeTableAdmin):
+    list_display = ('name', 'parent')
+    list_select_related = ('parent',)
+    search_fields = ('name',)
+    autocomplete_fields = ('parent',)
+
+
+@admin.register(Publishing)
+class PublishingAdmin(LargeTableAdmin):
+    list_display = ('name', 'country', 'city')
+    search_fields = ('name',)
+
+
+@admin.register(Book)
+class BookAdmin(LargeTableAdmin):
+    list_display = ('title', 'isbn', 'genre', 'publishing', 'year_published', 'available_copies', 'total_copies', 'variety')
+    list_select_related = ('genre', 'publishing')
+    search_fields = ('title', 'isbn')
+    autocomplete_fields = ('author', 'genre', 'publishing')
+
+
+class PhoneInline(admin.TabularInline):
+    model = Phone
+    extra = 0
+
+
+class AddressInline(admin.StackedInline):
+    model = Address
+    extra = 0
+
+
+@admin.register(Reader)
+class ReaderAdmin(LargeTableAdmin):
+    list_display = ('surname', 'first_name', 'last_name', 'email', 'gender')
+    search_fields = ('surname', 'first_name', 'email')
+    inlines = (PhoneInline, AddressInline)
+
+
+@admin.register(Lending)
+class LendingAdmin(LargeTableAdmin):
+    list_display = ('reader', 'book', 'branch', 'lending_date', 'return_date', 'returned')
+    list_select_related = ('reader', 'book', 'branch')
+    list_filter = ('returned', 'branch')
+    autocomplete_fields = ('reader', 'book')
+
+
+@admin.register(Phone)
+class PhoneAdmin(LargeTableAdmin):
+    list_display = ('phone', 'reader')
+    list_select_related = ('reader',)
+    search_fields = ('phone',)
+    raw_id_fields = ('reader',)
+
+
+@admin.register(Address)
+class AddressAdmin(LargeTableAdmin):
+    list_display = ('reader', 'country', 'city', 'street', 'building')
+    list_select_related = ('reader',)
+    search_fields = ('city', 'street')
+    raw_id_fields = ('reader',)
+
+
+@admin.register(Branch)
+class BranchAdmin(LargeTableAdmin):
+    list_display = ('name', 'city', 'address')
+    search_fields = ('name', 'city')
+
+
+@admin.register(BranchHolding)
+class BranchHoldingAdmin(LargeTableAdmin):
+    list_display = ('book', 'branch', 'available_copies', 'total_copies')
+    list_select_related = ('book', 'branch')
+    list_filter = ('branch',)
+    autocomplete_fields = ('book', 'branch')
+
+
+@admin.register(BranchTransfer)
+class BranchTransferAdmin(LargeTableAdmin):
+    list_display = ('book', 'from_branch', 'to_branch', 'copies', 'created_at')
+    list_select_related = ('book', 'from_branch', 'to_branch')
+    autocomplete_fields = ('book', 'from_branch', 'to_branch')
+
+
+@admin.register(Job)
+class JobAdmin(LargeTableAdmin):
+    list_display = ('task', 'status', 'attempts', 'progress', 'progress_total', 'worker', 'created_at', 'finished_at')
+    list_filter = ('status', 'task')
+    readonly_fields = ('attempts', 'progress', 'progress_total', 'message', 'result', 'error', 'worker',
+                       'started_at', 'finished_at')
+
+
+@admin.register(PurchaseSuggestion)
+class PurchaseSuggestionAdmin(LargeTableAdmin):
+    list_display = ('book', 'suggested_copies', 'current_copies', 'weekly_forecast', 'stockout_rate', 'computed_at')
+    list_select_related = ('book',)
+    ordering = ('-suggested_copies',)
+    raw_id_fields = ('book',)
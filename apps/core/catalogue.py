@@ -0,0 +1,54 @@
+from django.apps import apps
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+ROW_FIELDS = [
+    'title', 'author_names', 'genre_id', 'genre_name', 'publishing_id', 'publishing_name', 'isbn',
+    'year_published', 'available_copies', 'variety', 'created_at', 'updated_at',
+]
+SYNC_BATCH_SIZE = 1000
+
+
+def catalogue_row(book, now):
+    CatalogueRow = apps.get_model('core', 'CatalogueRow')
+    authors = sorted(book.author.all(), key=lambda author: author.pk)
+    return CatalogueRow(
+        book_id=book.pk,
+        title=book.title,
+        author_names=", ".join(f"{author.first_name} {author.surname}".strip() for author in authors),
+        genre_id=book.genre_id,
+        genre_name=book.genre.name if book.genre else "",
+        publishing_id=book.publishing_id,
+        publishing_name=book.publishing.name if book.publishing else "",
+        isbn=book.isbn,
+        year_published=book.year_published,
+        available_copies=book.available_copies,
+        variety=book.variety,
+        created_at=book.created_at,
+        updated_at=now,
+    )
+
+
+def sync_catalogue_rows(book_ids):
+    Book = apps.get_model('core', 'Book')
+    CatalogueRow = apps.get_model('core', 'CatalogueRow')
+    book_ids = list(book_ids)
+    now = timezone.now()
+    for start in range(0, len(book_ids), SYNC_BATCH_SIZE):
+        books = (
+            Book.objects.filter(id__in=book_ids[start:start + SYNC_BATCH_SIZE])
+            .select_related('genre', 'publishing').prefetch_related('author')
+        )
+        CatalogueRow.objects.bulk_create(
+            [catalogue_row(book, now) for book in books],
+            update_conflicts=True, unique_fields=['book'], update_fields=ROW_FIELDS,
+        )
+
+
+def refresh_catalogue_stock(book_ids):
+    Book = apps.get_model('core', 'Book')
+    CatalogueRow = apps.get_model('core', 'CatalogueRow')
+    CatalogueRow.objects.filter(book_id__in=book_ids).update(
+        available_copies=Subquery(Book.objects.filter(id=OuterRef('book_id')).values('available_copies')[:1]),
+        updated_at=timezone.now(),
+    )
@@ -0,0 +1,52 @@
+from django.apps import apps
+from django.db import connection, transaction
+
+PAIRS_SQL = """
+    SELECT a.author_id, b.author_id, COUNT(*)
+    FROM {link} a
+    JOIN {link} b ON a.book_id = b.book_id AND a.author_id <> b.author_id
+    WHERE a.author_id IN ({ids})
+    GROUP BY a.author_id, b.author_id
+"""
+
+
+def refresh_coauthorships(author_ids):
+    CoAuthorship = apps.get_model('core', 'CoAuthorship')
+    Book = apps.get_model('core', 'Book')
+    author_ids = {int(author_id) for author_id in author_ids}
+    if not author_ids:
+        return
+    sql = PAIRS_SQL.format(
+        link=connection.ops.quote_name(Book.author.through._meta.db_table),
+        ids=', '.join(str(author_id) for author_id in sorted(author_ids)),
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            pairs = cursor.fetchall()
+        CoAuthorship.objects.filter(author_id__in=author_ids).delete()
+        CoAuthorship.objects.filter(coauthor_id__in=author_ids).delete()
+        rows = [CoAuthorship(author_id=a, coauthor_id=b, book_count=n) for a, b, n in pairs]
+        rows += [CoAuthorship(author_id=b, coauthor_id=a, book_count=n) for a, b, n in pairs if b not in author_ids]
+        CoAuthorship.objects.bulk_create(rows, batch_size=1000)
+
+
+def coauthor_graph(author_id, hops, max_nodes):
+    CoAuthorship = apps.get_model('core', 'CoAuthorship')
+    distance = {author_id: 0}
+    edges = {}
+    frontier = {author_id}
+    for hop in range(1, hops + 1):
+        if not frontier or len(distance) >= max_nodes:
+            break
+        links = CoAuthorship.objects.filter(author_id__in=frontier)
+        next_frontier = set()
+        for source, target, books in links.values_list('author_id', 'coauthor_id', 'book_count'):
+            if target not in distance:
+                if len(distance) >= max_nodes:
+                    continue
+                distance[target] = hop
+                next_frontier.add(target)
+            edges[min(source, target), max(source, target)] = books
+        frontier = next_frontier
+    return distance, edges
@@ -0,0 +1,109 @@
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db.models.functions import Lower
+
+from apps.core.isbn import normalize_isbn
+from apps.core.models import Author, Book, Reader
+
+BULK_MAX_ROWS = 500
+
+
+class BulkModelForm(forms.ModelForm):
+    # Uniqueness is checked once for the whole formset in BulkFormSet.clean()
+    # instead of with one query per row.
+    def validate_unique(self):
+        pass
+
+
+class BookBulkForm(BulkModelForm):
+    isbn = forms.CharField(max_length=20, label='ISBN')
+    author = forms.CharField(required=False)
+    genre_id = forms.TypedChoiceField(coerce=int, required=False, empty_value=None, label='Genre')
+    publishing_id = forms.TypedChoiceField(coerce=int, required=False, empty_value=None, label='Publishing')
+
+    class Meta:
+        model = Book
+        fields = ['title', 'isbn', 'year_published', 'available_copies', 'variety']
+
+    def __init__(self, *args, genre_choices=(), publishing_choices=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['genre_id'].choices = [('', '---------'), *genre_choices]
+        self.fields['publishing_id'].choices = [('', '---------'), *publishing_choices]
+
+    def clean_isbn(self):
+        return normalize_isbn(self.cleaned_data['isbn'])
+
+    def save(self, commit=True):
+        book = super().save(commit=False)
+        book.genre_id = self.cleaned_data['genre_id']
+        book.publishing_id = self.cleaned_data['publishing_id']
+        if commit:
+            book.save()
+        return book
+
+
+class ReaderBulkForm(BulkModelForm):
+    class Meta:
+        model = Reader
+        fields = ['surname', 'first_name', 'last_name', 'birth_date', 'email', 'gender']
+        widgets = {'birth_date': forms.DateInput(attrs={'type': 'date'})}
+
+
+class AuthorBulkForm(BulkModelForm):
+    class Meta:
+        model = Author
+        fields = ['surname', 'first_name', 'last_name', 'birth_date', 'gender']
+        widgets = {'birth_date': forms.DateInput(attrs={'type': 'date'})}
+
+
+class BulkFormSet(forms.BaseFormSet):
+    unique_field = None
+
+    def existing_values(self, values):
+        return set()
+
+    def normalize_unique(self, value):
+        return value
+
+    def filled_forms(self):
+        return [form for form in self.forms if form.has_changed() and form.is_valid()]
+
+    def clean(self):
+        if any(self.errors) or self.unique_field is None:
+            return
+        seen = {}
+        for form in self.filled_forms():
+            value = self.normalize_unique(form.cleaned_data[self.unique_field])
+            if value in seen:
+                form.add_error(self.unique_field, "Duplicate value in this batch.")
+            seen[value] = form
+        for value in self.existing_values(seen):
+            seen[value].add_error(self.unique_field, "Already exists.")
+        if any(self.errors):
+            raise ValidationError("Please correct the highlighted rows.")
+
+
+class BookBulkFormSet(BulkFormSet):
+    unique_field = 'isbn'
+
+    def existing_values(self, values):
+        return set(Book.objects.filter(isbn__in=values).values_list('isbn', flat=True))
+
+
+class ReaderBulkFormSet(BulkFormSet):
+    unique_field = 'email'
+
+    def normalize_unique(self, value):
+        return value.lower()
+
+    def existing_values(self, values):
+        return set(
+            Reader.objects.alias(email_lower=Lower('email')).filter(email_lower__in=values)
+            .annotate(found=Lower('email')).values_list('found', flat=True)
+        )
+
+
+def bulk_formset(form_class, formset_class, rows):
+    return forms.formset_factory(
+        form_class, formset=formset_class, extra=rows, max_num=BULK_MAX_ROWS, absolute_max=BULK_MAX_ROWS
+    )
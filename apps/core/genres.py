@@ -0,0 +1,62 @@
+from django.apps import apps
+
+
+def closure_model():
+    return apps.get_model('core', 'GenreClosure')
+
+
+def subtree_ids(genre_id):
+    return closure_model().objects.filter(ancestor_id=genre_id).values('descendant_id')
+
+
+def in_subtree(genre_id, root_id):
+    return closure_model().objects.filter(ancestor_id=root_id, descendant_id=genre_id).exists()
+
+
+def insert_genre(genre_id, parent_id):
+    GenreClosure = closure_model()
+    rows = [GenreClosure(ancestor_id=genre_id, descendant_id=genre_id, depth=0)]
+    if parent_id:
+        ancestors = GenreClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth')
+        rows += [
+            GenreClosure(ancestor_id=ancestor_id, descendant_id=genre_id, depth=depth + 1)
+            for ancestor_id, depth in ancestors
+        ]
+    GenreClosure.objects.bulk_create(rows)
+
+
+def detach_subtree(genre_id):
+    GenreClosure = closure_model()
+    ancestor_ids = list(
+        GenreClosure.objects.filter(descendant_id=genre_id, depth__gt=0).values_list('ancestor_id', flat=True)
+    )
+    if ancestor_ids:
+        GenreClosure.objects.filter(descendant_id__in=subtree_ids(genre_id), ancestor_id__in=ancestor_ids).delete()
+
+
+def move_subtree(genre_id, parent_id):
+    GenreClosure = closure_model()
+    detach_subtree(genre_id)
+    if not parent_id:
+        return
+    ancestors = list(GenreClosure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'))
+    descendants = list(GenreClosure.objects.filter(ancestor_id=genre_id).values_list('descendant_id', 'depth'))
+    GenreClosure.objects.bulk_create([
+        GenreClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+        for ancestor_id, up in ancestors
+        for descendant_id, down in descendants
+    ], batch_size=1000)
+
+
+def genre_tree(genres):
+    children = {}
+    for genre in sorted(genres, key=lambda genre: genre.name.lower()):
+        children.setdefault(genre.parent_id, []).append(genre)
+    tree, stack = [], [(genre, 0) for genre in reversed(children.get(None, []))]
+    while stack:
+        genre, level = stack.pop()
+        genre.level = level
+        genre.label = '— ' * level + genre.name
+        tree.append(genre)
+        stack.extend((child, level + 1) for child in reversed(children.get(genre.pk, [])))
+    return tree
@@ -0,0 +1,105 @@
+import atexit
+import logging
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class InventoryEventBuffer:
+    def __init__(self):
+        self._events = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def batch_size(self):
+        return getattr(settings, 'INVENTORY_EVENT_BATCH_SIZE', 500)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'INVENTORY_EVENT_FLUSH_INTERVAL', 2.0)
+
+    def record(self, book_id, kind, delta, lending_id=None):
+        InventoryEvent = apps.get_model('core', 'InventoryEvent')
+        event = InventoryEvent(
+            book_id=book_id,
+            lending_id=lending_id,
+            kind=kind,
+            delta=delta,
+            occurred_at=timezone.now(),
+        )
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= self.batch_size
+        if self.flush_interval:
+            self._ensure_worker()
+            if full:
+                self._wake.set()
+        elif full:
+            self.flush()
+
+    def record_on_commit(self, book_id, kind, delta, lending_id=None):
+        transaction.on_commit(lambda: self.record(book_id, kind, delta, lending_id))
+
+    def flush(self):
+        with self._lock:
+            events, self._events = self._events, []
+        if events:
+            from apps.core.rollups import apply_events
+
+            InventoryEvent = apps.get_model('core', 'InventoryEvent')
+            try:
+                with transaction.atomic():
+                    InventoryEvent.objects.bulk_create(events, batch_size=self.batch_size)
+                    apply_events(events)
+            except Exception:
+                for event in events:
+                    event.pk = None
+                    event._state.adding = True
+                with self._lock:
+                    self._events = events + self._events
+                raise
+        return len(events)
+
+    def pending(self):
+        with self._lock:
+            return len(self._events)
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='inventory-events', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Inventory event flush failed; %d events kept for the next attempt.", self.pending())
+            finally:
+                close_old_connections()
+
+
+event_buffer = InventoryEventBuffer()
+atexit.register(event_buffer.flush)
+
+
+def stock_as_of(when, book_ids=None):
+    InventoryEvent = apps.get_model('core', 'InventoryEvent')
+    events = InventoryEvent.objects.filter(occurred_at__lte=when)
+    if book_ids is not None:
+        events = events.filter(book_id__in=book_ids)
+    return dict(events.values('book_id').annotate(stock=Sum('delta')).values_list('book_id', 'stock'))
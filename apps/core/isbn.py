@@ -0,0 +1,33 @@
+from django.core.exceptions import ValidationError
+
+
+def isbn13_check_digit(digits):
+    total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def isbn10_is_valid(value):
+    total = 0
+    for i, char in enumerate(value):
+        if char == 'X' and i == 9:
+            digit = 10
+        elif char.isdigit():
+            digit = int(char)
+        else:
+            return False
+        total += digit * (10 - i)
+    return total % 11 == 0
+
+
+def normalize_isbn(value):
+    cleaned = ''.join(char for char in str(value).upper() if char.isalnum())
+    if len(cleaned) == 10:
+        if not isbn10_is_valid(cleaned):
+            raise ValidationError(f"Invalid ISBN-10 checksum: {value}")
+        cleaned = '978' + cleaned[:9]
+        return cleaned + isbn13_check_digit(cleaned)
+    if len(cleaned) == 13 and cleaned.isdigit():
+        if cleaned[12] != isbn13_check_digit(cleaned):
+            raise ValidationError(f"Invalid ISBN-13 checksum: {value}")
+        return cleaned
+    raise ValidationError(f"ISBN must have 10 or 13 digits: {value}")
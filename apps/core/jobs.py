@@ -0,0 +1,189 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from contextlib import nullcontext
+from datetime import timedelta
+from io import StringIO
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core.catalogue import sync_catalogue_rows
+
+logger = logging.getLogger(__name__)
+
+CLAIM_ATTEMPTS = 5
+
+TASKS = {}
+
+
+def task(name):
+    def register(function):
+        TASKS[name] = function
+        return function
+    return register
+
+
+def enqueue(task_name, max_attempts=None, run_after=None, **arguments):
+    if task_name not in TASKS:
+        raise KeyError(f"Unknown task: {task_name}")
+    Job = apps.get_model('core', 'Job')
+    job = Job(task=task_name, arguments=arguments, max_attempts=max_attempts or getattr(settings, 'JOB_MAX_ATTEMPTS', 3))
+    if run_after is not None:
+        job.run_after = run_after
+    job.save()
+    return job
+
+
+class JobContext:
+    def __init__(self, job):
+        self.job = job
+
+    def progress(self, done, total=None, message=''):
+        Job = apps.get_model('core', 'Job')
+        changes = {"progress": done, "message": message[:255], "updated_at": timezone.now()}
+        if total is not None:
+            changes["progress_total"] = total
+        Job.objects.filter(pk=self.job.pk).update(**changes)
+
+
+def claim_job(worker):
+    Job = apps.get_model('core', 'Job')
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    for _ in range(CLAIM_ATTEMPTS):
+        now = timezone.now()
+        queued = Job.objects.filter(status='QUEUED', run_after__lte=now).order_by('run_after', 'id')
+        # With SKIP LOCKED concurrent workers pass over each other's rows.
+        # Elsewhere (SQLite) the candidate is read in autocommit mode and the
+        # guarded update decides which worker wins it.
+        with transaction.atomic() if skip_locked else nullcontext():
+            job = (queued.select_for_update(skip_locked=True) if skip_locked else queued).first()
+            if job is None:
+                return None
+            claimed = Job.objects.filter(pk=job.pk, status='QUEUED').update(
+                status='RUNNING', worker=worker, attempts=job.attempts + 1, started_at=now, updated_at=now,
+            )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def heartbeat(job_id, stop, interval):
+    Job = apps.get_model('core', 'Job')
+    while not stop.wait(interval):
+        try:
+            Job.objects.filter(pk=job_id, status='RUNNING').update(updated_at=timezone.now())
+        except Exception:
+            logger.exception("Heartbeat for job %s failed.", job_id)
+
+
+def _heartbeat_thread(job_id, stop, interval):
+    try:
+        heartbeat(job_id, stop, interval)
+    finally:
+        connection.close()
+
+
+def run_job(job):
+    Job = apps.get_model('core', 'Job')
+    # Keep the job fresh while the task runs, whether or not it reports
+    # progress, so requeue_stale_jobs() only picks up jobs whose worker died.
+    stop = threading.Event()
+    beat = threading.Thread(
+        target=_heartbeat_thread, args=(job.pk, stop, getattr(settings, 'JOB_HEARTBEAT_INTERVAL', 60)),
+        name=f'job-{job.pk}-heartbeat', daemon=True,
+    )
+    beat.start()
+    try:
+        result = TASKS[job.task](JobContext(job), **job.arguments)
+    except Exception:
+        now = timezone.now()
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = getattr(settings, 'JOB_RETRY_DELAY', 30) * 2 ** (job.attempts - 1)
+            Job.objects.filter(pk=job.pk).update(
+                status='QUEUED', error=error, run_after=now + timedelta(seconds=delay), updated_at=now,
+            )
+        else:
+            Job.objects.filter(pk=job.pk).update(status='FAILED', error=error, finished_at=now, updated_at=now)
+        return False
+    finally:
+        stop.set()
+        beat.join()
+    now = timezone.now()
+    Job.objects.filter(pk=job.pk).update(status='DONE', result=result, error='', finished_at=now, updated_at=now)
+    return True
+
+
+def requeue_stale_jobs():
+    Job = apps.get_model('core', 'Job')
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status='RUNNING', updated_at__lt=now - timedelta(seconds=getattr(settings, 'JOB_STALE_AFTER', 3600))
+    )
+    # The lost run already counted as an attempt when it was claimed.
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='FAILED', error='The worker stopped before the job finished.', finished_at=now, updated_at=now,
+    )
+    requeued = stale.update(status='QUEUED', worker='', run_after=now, updated_at=now)
+    return requeued, failed
+
+
+def work(worker=None, once=False, poll_interval=None, requeue_stale=False):
+    if not apps.ready:
+        django.setup()
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    poll_interval = poll_interval if poll_interval is not None else getattr(settings, 'JOB_POLL_INTERVAL', 2.0)
+    requeue_interval = getattr(settings, 'JOB_STALE_AFTER', 3600) / 4
+    next_requeue = time.monotonic() + requeue_interval
+    processed = 0
+    while True:
+        close_old_connections()
+        if requeue_stale and time.monotonic() >= next_requeue:
+            requeued, failed = requeue_stale_jobs()
+            if requeued or failed:
+                logger.warning("Requeued %d and failed %d stale jobs.", requeued, failed)
+            next_requeue = time.monotonic() + requeue_interval
+        job = claim_job(worker)
+        if job is not None:
+            run_job(job)
+            processed += 1
+        elif once:
+            return processed
+        else:
+            time.sleep(poll_interval)
+
+
+def command_task(command_name):
+    def run(context, **options):
+        output = StringIO()
+        call_command(command_name, stdout=output, **options)
+        return {"output": output.getvalue()[-4000:]}
+    return task(command_name)(run)
+
+
+COMMAND_TASKS = (
+    'reconcile_inventory', 'build_recommendations', 'backfill_rollups', 'export_catalogue', 'forecast_purchases',
+)
+
+for name in COMMAND_TASKS:
+    command_task(name)
+
+
+@task('rebuild_catalogue')
+def rebuild_catalogue(context, batch_size=1000):
+    Book = apps.get_model('core', 'Book')
+    book_ids = list(Book.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(book_ids), batch_size):
+        sync_catalogue_rows(book_ids[start:start + batch_size])
+        context.progress(min(start + batch_size, len(book_ids)), len(book_ids))
+    return {"books": len(book_ids)}
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.inventory import event_buffer
+from apps.core.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild circulation rollups from the full lending history."
+
+    def handle(self, *args, **options):
+        event_buffer.flush()
+        created = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Stored {created} rollup rows."))
@@ -0,0 +1,148 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from apps.core.catalogue import sync_catalogue_rows
+from apps.core.inventory import event_buffer
+from apps.core.isbn import isbn13_check_digit
+from apps.core.models import Book, CatalogueRow, Lending, Reader, Variety
+
+SEARCH_TERMS = ['bench', 'title 1', 'title 42', 'missing', 'author']
+
+
+class Command(BaseCommand):
+    help = "Benchmark the configured database profile on a throwaway copy of the schema."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=2000, help="Books inserted.")
+        parser.add_argument('--loans', type=int, default=500, help="Borrow/return pairs per phase.")
+        parser.add_argument('--desks', type=int, default=4, help="Concurrent desks in the contention phase.")
+        parser.add_argument('--searches', type=int, default=200, help="Catalogue searches.")
+        parser.add_argument('--json', help="Write the results to this file.")
+        parser.add_argument('--compare', help="Results file from another profile to compare against.")
+
+    def handle(self, *args, **options):
+        creation = connection.creation
+        if connection.vendor == 'sqlite' and not connection.settings_dict['TEST'].get('NAME'):
+            # An in-memory test database would skip WAL and the disk entirely.
+            connection.settings_dict['TEST']['NAME'] = str(settings.BASE_DIR / 'benchmark.sqlite3')
+        old_name = connection.settings_dict['NAME']
+        creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = self.run_workload(options)
+            profile = self.profile()
+        finally:
+            event_buffer.flush()
+            creation.destroy_test_db(old_name, verbosity=0)
+
+        report = {"vendor": connection.vendor, "profile": profile, "results": results}
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as compare_file:
+                baseline = json.load(compare_file)
+        self.stdout.write(f"Profile: {connection.vendor} {report['profile']}")
+        for name, result in results.items():
+            line = f"{name:<24} {result['seconds']:>8.3f}s {result['ops_per_second']:>10.1f} ops/s"
+            if result.get('errors'):
+                line += f" ({result['errors']} errors)"
+            if baseline and name in baseline['results']:
+                other = baseline['results'][name]['ops_per_second']
+                ratio = result['ops_per_second'] / other if other else 0
+                line += f"  {ratio:.2f}x {baseline['vendor']}"
+            self.stdout.write(line)
+        if options['json']:
+            with open(options['json'], 'w') as json_file:
+                json.dump(report, json_file, indent=2)
+
+    def profile(self):
+        if connection.vendor != 'sqlite':
+            return {}
+        with connection.cursor() as cursor:
+            return {
+                pragma: cursor.execute(f'PRAGMA {pragma}').fetchone()[0]
+                for pragma in ('journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'busy_timeout')
+            }
+
+    def timed(self, results, name, operations, work):
+        started = time.perf_counter()
+        errors = work() or 0
+        seconds = time.perf_counter() - started
+        results[name] = {
+            "operations": operations,
+            "seconds": round(seconds, 4),
+            "ops_per_second": round(operations / seconds, 1) if seconds else 0.0,
+            "errors": errors,
+        }
+
+    def run_workload(self, options):
+        results = {}
+        desks = max(options['desks'], 1)
+        loans = options['loans'] - options['loans'] % desks
+        books = [
+            Book(title=f"Bench title {n}", isbn=self.isbn(n), year_published=2000, available_copies=loans + 1,
+                 total_copies=loans + 1, variety=Variety.PAPERBACK)
+            for n in range(max(options['books'], desks))
+        ]
+        readers = [
+            Reader(surname=f"Bench{n}", first_name="Desk", last_name="Reader", email=f"bench{n}@example.com")
+            for n in range(desks)
+        ]
+
+        def insert_books():
+            Book.objects.bulk_create(books, batch_size=500)
+            Reader.objects.bulk_create(readers)
+            sync_catalogue_rows(Book.objects.values_list('id', flat=True))
+
+        self.timed(results, 'bulk_insert', len(books), insert_books)
+        desk_books = list(Book.objects.order_by('id')[:desks])
+        readers = list(Reader.objects.order_by('id'))
+
+        def desk(book, reader, count):
+            errors = 0
+            for _ in range(count):
+                try:
+                    lending = Lending.objects.create(book=Book.objects.get(pk=book.pk), reader=reader)
+                    lending.returned = True
+                    lending.save()
+                except OperationalError:
+                    errors += 1
+            return errors
+
+        def desk_in_thread(book, reader, count):
+            try:
+                return desk(book, reader, count)
+            finally:
+                connection.close()
+
+        self.timed(results, 'desk_writes', loans * 2, lambda: desk(desk_books[0], readers[0], loans))
+
+        def contended():
+            with ThreadPoolExecutor(max_workers=desks) as pool:
+                futures = [pool.submit(desk_in_thread, desk_books[n], readers[n], loans // desks) for n in range(desks)]
+                return sum(future.result() for future in futures)
+
+        self.timed(results, 'concurrent_desk_writes', loans * 2, contended)
+
+        def search():
+            for n in range(options['searches']):
+                term = SEARCH_TERMS[n % len(SEARCH_TERMS)]
+                list(CatalogueRow.objects.filter(title__icontains=term).order_by('book_id')[:50])
+
+        self.timed(results, 'catalogue_search', options['searches'], search)
+
+        isbns = list(Book.objects.order_by('?').values_list('isbn', flat=True)[:options['searches']])
+
+        def lookups():
+            for isbn in isbns:
+                Book.objects.filter(isbn=isbn).values('id', 'isbn', 'title', 'available_copies').first()
+
+        self.timed(results, 'isbn_lookup', len(isbns), lookups)
+        return results
+
+    def isbn(self, n):
+        digits = f"979{n:09d}"
+        return digits + isbn13_check_digit(digits)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.core.models import BookRecommendation, Lending
+
+CO_OCCURRENCE_SQL = """
+    INSERT INTO {recommendation} (book_id, recommended_id, score, rank)
+    SELECT book_id, recommended_id, score, rank FROM (
+        SELECT
+            a.book_id AS book_id,
+            b.book_id AS recommended_id,
+            COUNT(*) AS score,
+            ROW_NUMBER() OVER (
+                PARTITION BY a.book_id ORDER BY COUNT(*) DESC, b.book_id
+            ) AS rank
+        FROM (SELECT DISTINCT reader_id, book_id FROM {lending}) a
+        JOIN (SELECT DISTINCT reader_id, book_id FROM {lending}) b
+            ON a.reader_id = b.reader_id AND a.book_id <> b.book_id
+        GROUP BY a.book_id, b.book_id
+    ) co_occurrence
+    WHERE rank <= %s
+"""
+
+
+class Command(BaseCommand):
+    help = "Rebuild the 'readers who borrowed this also borrowed' table from lending history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help="Recommendations kept per book.")
+
+    def handle(self, *args, **options):
+        sql = CO_OCCURRENCE_SQL.format(
+            recommendation=connection.ops.quote_name(BookRecommendation._meta.db_table),
+            lending=connection.ops.quote_name(Lending._meta.db_table),
+        )
+        with transaction.atomic():
+            BookRecommendation.objects.all().delete()
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [options['top']])
+                created = cursor.rowcount
+        self.stdout.write(self.style.SUCCESS(f"Stored {created} recommendations."))
@@ -0,0 +1,27 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.snapshot import SNAPSHOT_NAME, build_delta, build_snapshot, snapshot_dir
+
+
+class Command(BaseCommand):
+    help = "Write a read-only catalogue snapshot for kiosks, or a delta against the current one."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delta', action='store_true',
+                            help="Only write books changed or removed since the last full snapshot.")
+        parser.add_argument('--output', help="Snapshot directory (default: CATALOGUE_SNAPSHOT_DIR).")
+
+    def handle(self, *args, **options):
+        directory = Path(options['output']) if options['output'] else snapshot_dir()
+        started = time.monotonic()
+        if options['delta']:
+            if not (directory / SNAPSHOT_NAME).exists():
+                raise CommandError("No full snapshot to apply a delta to. Run without --delta first.")
+            upserts, deleted = build_delta(directory)
+            summary = f"Wrote delta with {upserts} changed and {deleted} removed books"
+        else:
+            summary = f"Wrote snapshot of {build_snapshot(directory)} books"
+        self.stdout.write(self.style.SUCCESS(f"{summary} in {time.monotonic() - started:.1f}s."))
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncWeek
+from django.utils import timezone
+
+from apps.core.models import Book, Lending, PurchaseSuggestion
+
+FORECAST_SQL = """
+    INSERT INTO {suggestion} (book_id, weekly_forecast, stockout_rate, current_copies, suggested_copies, computed_at)
+    SELECT book_id, forecast, stockout_rate, copies, target - copies, %s FROM (
+        SELECT book_id, forecast, stockout_rate, copies, CAST(CEILING(forecast * %s) AS INTEGER) AS target FROM (
+            SELECT
+                w.book_id AS book_id,
+                %s * SUM(CASE WHEN w.week >= %s THEN w.loans ELSE 0 END) / %s + %s * SUM(w.loans) / %s AS forecast,
+                1.0 * SUM(CASE WHEN w.loans * %s > COALESCE(b.total_copies, b.available_copies) THEN 1 ELSE 0 END)
+                    / %s AS stockout_rate,
+                COALESCE(b.total_copies, b.available_copies) AS copies
+            FROM ({weekly}) w
+            JOIN {book} b ON b.id = w.book_id
+            GROUP BY w.book_id, b.total_copies, b.available_copies
+        ) forecasts
+    ) targets
+    WHERE target > copies
+"""
+
+
+class Command(BaseCommand):
+    help = "Forecast weekly demand per book from lending history and store purchase suggestions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history-weeks', type=int, default=getattr(settings, 'FORECAST_HISTORY_WEEKS', 52),
+                            help="Weeks of lending history used for the long-run rate.")
+        parser.add_argument('--recent-weeks', type=int, default=getattr(settings, 'FORECAST_RECENT_WEEKS', 8),
+                            help="Weeks used for the recent rate.")
+        parser.add_argument('--recent-weight', type=float, default=getattr(settings, 'FORECAST_RECENT_WEIGHT', 0.6),
+                            help="Share of the forecast taken from the recent rate.")
+
+    def handle(self, *args, **options):
+        history_weeks, recent_weeks = options['history_weeks'], options['recent_weeks']
+        weight = options['recent_weight']
+        today = timezone.localdate()
+        weekly = (
+            Lending.objects.filter(lending_date__gte=today - timedelta(weeks=history_weeks))
+            .annotate(week=TruncWeek('lending_date'))
+            .values('book_id', 'week')
+            .annotate(loans=Count('id'))
+            .order_by()
+        )
+        weekly_sql, weekly_params = weekly.query.sql_with_params()
+        loan_weeks = getattr(settings, 'FORECAST_LOAN_WEEKS', 3)
+        sql = FORECAST_SQL.format(
+            suggestion=connection.ops.quote_name(PurchaseSuggestion._meta.db_table),
+            book=connection.ops.quote_name(Book._meta.db_table),
+            weekly=weekly_sql,
+        )
+        params = [
+            timezone.now(),
+            loan_weeks * (1 + getattr(settings, 'FORECAST_SAFETY_FACTOR', 0.2)),
+            weight, today - timedelta(weeks=recent_weeks), recent_weeks, 1 - weight, history_weeks,
+            loan_weeks, history_weeks,
+            *weekly_params,
+        ]
+        with transaction.atomic():
+            PurchaseSuggestion.objects.all().delete()
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                created = cursor.rowcount
+        self.stdout.write(self.style.SUCCESS(f"Stored {created} purchase suggestions."))
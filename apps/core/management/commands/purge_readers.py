@@ -0,0 +1,103 @@
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import CharField, Count, F, Value
+from django.db.models.functions import Cast, Concat
+from django.utils.dateparse import parse_date
+
+from apps.core.catalogue import refresh_catalogue_stock
+from apps.core.inventory import event_buffer
+from apps.core.models import (Address, Book, BranchHolding, Gender, InventoryEventKind, Lending, Phone,
+                              Reader)
+
+
+class Command(BaseCommand):
+    help = "Delete or anonymize readers in bounded chunks. Deletion returns open loans to stock."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', help="Comma-separated reader ids.")
+        parser.add_argument('--id-file', help="File with one reader id per line.")
+        parser.add_argument('--inactive-before', help="Readers with no lending on or after this date (YYYY-MM-DD).")
+        parser.add_argument('--anonymize', action='store_true',
+                            help="Strip personal data but keep the reader row and lending history.")
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between chunks.")
+
+    def handle(self, *args, **options):
+        readers = self.selected_readers(options)
+        process = self.anonymize_chunk if options['anonymize'] else self.delete_chunk
+        started = time.monotonic()
+        total = 0
+        last_id = 0
+        while True:
+            ids = list(
+                readers.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:options['chunk_size']]
+            )
+            if not ids:
+                break
+            chunk_started = time.monotonic()
+            with transaction.atomic():
+                process(ids)
+            total += len(ids)
+            last_id = ids[-1]
+            elapsed = time.monotonic() - chunk_started
+            self.stdout.write(f"Readers {ids[0]}-{ids[-1]}: {len(ids)} in {elapsed:.2f}s "
+                              f"({len(ids) / max(elapsed, 1e-6):.0f}/s)")
+            if options['pause']:
+                time.sleep(options['pause'])
+        event_buffer.flush()
+        elapsed = time.monotonic() - started
+        action = "Anonymized" if options['anonymize'] else "Purged"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {total} readers in {elapsed:.1f}s ({total / max(elapsed, 1e-6):.0f}/s)."
+        ))
+
+    def selected_readers(self, options):
+        if options['ids']:
+            return Reader.objects.filter(id__in=[int(pk) for pk in options['ids'].split(',') if pk.strip()])
+        if options['id_file']:
+            with open(options['id_file']) as id_file:
+                return Reader.objects.filter(id__in=[int(line) for line in id_file if line.strip()])
+        if options['inactive_before']:
+            cutoff = parse_date(options['inactive_before'])
+            if cutoff is None:
+                raise CommandError(f"Invalid date: {options['inactive_before']}")
+            recent = Lending.objects.filter(lending_date__gte=cutoff).values('reader_id')
+            return Reader.objects.filter(created_at__date__lt=cutoff).exclude(id__in=recent)
+        raise CommandError("Select readers with --ids, --id-file or --inactive-before.")
+
+    def restore_open_loans(self, ids):
+        open_loans = Lending.objects.filter(reader_id__in=ids, returned=False)
+        books_by_count = defaultdict(list)
+        for row in open_loans.values('book_id').annotate(n=Count('id')):
+            books_by_count[row['n']].append(row['book_id'])
+        for count, book_ids in books_by_count.items():
+            Book.objects.filter(id__in=book_ids).update(available_copies=F('available_copies') + count)
+            refresh_catalogue_stock(book_ids)
+        for row in open_loans.filter(branch__isnull=False).values('branch_id', 'book_id').annotate(n=Count('id')):
+            BranchHolding.objects.filter(branch_id=row['branch_id'], book_id=row['book_id']).update(
+                available_copies=F('available_copies') + row['n']
+            )
+        for lending_id, book_id in open_loans.values_list('id', 'book_id'):
+            event_buffer.record_on_commit(book_id, InventoryEventKind.RETURN, 1, lending_id=lending_id)
+
+    def delete_chunk(self, ids):
+        self.restore_open_loans(ids)
+        Lending.objects.filter(reader_id__in=ids).delete()
+        Phone.objects.filter(reader_id__in=ids).delete()
+        Address.objects.filter(reader_id__in=ids).delete()
+        Reader.objects.filter(id__in=ids).delete()
+
+    def anonymize_chunk(self, ids):
+        Phone.objects.filter(reader_id__in=ids).delete()
+        Address.objects.filter(reader_id__in=ids).delete()
+        Reader.objects.filter(id__in=ids).update(
+            surname='Anonymized',
+            first_name='Anonymized',
+            last_name='',
+            birth_date=None,
+            gender=Gender.NOT_SPECIFIED,
+            email=Concat(Value('anonymized-'), Cast('id', CharField()), Value('@invalid')),
+        )
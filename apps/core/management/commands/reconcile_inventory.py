@@ -0,0 +1,94 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from apps.core.catalogue import refresh_catalogue_stock
+from apps.core.inventory import event_buffer
+from apps.core.models import Book, InventoryEventKind, Lending
+
+EXPECTED_SQL = """
+    SELECT b.id, b.available_copies, expected FROM (
+        SELECT b.id, b.available_copies,
+            CASE WHEN b.total_copies > COALESCE(o.open_count, 0)
+                THEN b.total_copies - COALESCE(o.open_count, 0) ELSE 0 END AS expected
+        FROM {book} b
+        LEFT JOIN (
+            SELECT book_id, COUNT(*) AS open_count FROM {lending}
+            WHERE NOT returned AND book_id BETWEEN %s AND %s
+            GROUP BY book_id
+        ) o ON o.book_id = b.id
+        WHERE b.id BETWEEN %s AND %s AND b.total_copies IS NOT NULL
+    ) b
+    WHERE b.available_copies <> expected
+    ORDER BY b.id
+"""
+
+FIX_SQL = """
+    UPDATE {book} SET available_copies = CASE
+        WHEN total_copies > (SELECT COUNT(*) FROM {lending} l WHERE l.book_id = {book}.id AND NOT l.returned)
+        THEN total_copies - (SELECT COUNT(*) FROM {lending} l WHERE l.book_id = {book}.id AND NOT l.returned)
+        ELSE 0 END
+    WHERE id IN ({ids})
+"""
+
+
+class Command(BaseCommand):
+    help = "Compare available copies with total copies minus open lendings and optionally fix mismatches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Write the expected availability back.")
+        parser.add_argument('--chunk-size', type=int, default=50000, help="Book ids per chunk.")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Chunks processed in parallel (default 4, or 1 on SQLite's single writer).")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        bounds = Book.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write("No books to reconcile.")
+            return
+        step = options['chunk_size']
+        chunks = [(low, min(low + step - 1, bounds['high'])) for low in range(bounds['low'], bounds['high'] + 1, step)]
+
+        workers = options['workers'] or (1 if connection.vendor == 'sqlite' else 4)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(lambda chunk: self.reconcile_chunk_in_thread(chunk, options['fix']), chunks))
+        else:
+            results = [self.reconcile_chunk(chunk, options['fix']) for chunk in chunks]
+
+        mismatches = [row for chunk_rows in results for row in chunk_rows]
+        for book_id, actual, expected in mismatches:
+            self.stdout.write(f"Book {book_id}: available {actual}, expected {expected}")
+        event_buffer.flush()
+        action = "Fixed" if options['fix'] else "Found"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {len(mismatches)} mismatches in {len(chunks)} chunks ({time.monotonic() - started:.1f}s)."
+        ))
+
+    def reconcile_chunk_in_thread(self, chunk, fix):
+        try:
+            return self.reconcile_chunk(chunk, fix)
+        finally:
+            connection.close()
+
+    def reconcile_chunk(self, chunk, fix):
+        low, high = chunk
+        tables = {
+            'book': connection.ops.quote_name(Book._meta.db_table),
+            'lending': connection.ops.quote_name(Lending._meta.db_table),
+        }
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(EXPECTED_SQL.format(**tables), [low, high, low, high])
+                rows = cursor.fetchall()
+                if fix and rows:
+                    ids = ', '.join(str(int(book_id)) for book_id, _, _ in rows)
+                    cursor.execute(FIX_SQL.format(ids=ids, **tables))
+                    refresh_catalogue_stock([book_id for book_id, _, _ in rows])
+                    for book_id, actual, expected in rows:
+                        event_buffer.record_on_commit(book_id, InventoryEventKind.ADJUST, expected - actual)
+        return rows
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.catalogue import refresh_catalogue_stock
+from apps.core.inventory import event_buffer, stock_as_of
+from apps.core.models import Book, InventoryEvent, InventoryEventKind
+
+
+class Command(BaseCommand):
+    help = "Rebuild available copies from the inventory event log as of a point in time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--at', help="ISO timestamp to replay up to (default: now).")
+        parser.add_argument('--apply', action='store_true', help="Write the replayed stock back to books.")
+        parser.add_argument('--yes', action='store_true',
+                            help="Confirm --apply after checking that every process has flushed its events.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        event_buffer.flush()
+        when = timezone.now()
+        if options['at']:
+            when = parse_datetime(options['at'])
+            if when is None:
+                raise CommandError(f"Invalid timestamp: {options['at']}")
+            if timezone.is_naive(when):
+                when = timezone.make_aware(when)
+        stock = stock_as_of(when)
+
+        changed = []
+        for book in Book.objects.only('id', 'available_copies').iterator(chunk_size=options['batch_size']):
+            copies = max(stock.get(book.id, 0), 0)
+            if copies != book.available_copies:
+                self.stdout.write(f"Book {book.id}: {book.available_copies} -> {copies}")
+                book.available_copies = copies
+                changed.append(book)
+        if options['apply'] and changed and not options['yes']:
+            raise CommandError(
+                "The log only covers events flushed so far; other processes may still buffer up to "
+                "INVENTORY_EVENT_FLUSH_INTERVAL of events. Review the differences above and rerun with --yes."
+            )
+        if options['apply'] and changed:
+            with transaction.atomic():
+                Book.objects.bulk_update(changed, ['available_copies'], batch_size=options['batch_size'])
+                refresh_catalogue_stock([book.id for book in changed])
+                # Keep the log consistent with the stock just written, so a
+                # later replay starts from the corrected numbers.
+                logged = stock_as_of(timezone.now(), [book.id for book in changed])
+                now = timezone.now()
+                InventoryEvent.objects.bulk_create([
+                    InventoryEvent(book_id=book.id, kind=InventoryEventKind.ADJUST,
+                                   delta=book.available_copies - logged.get(book.id, 0), occurred_at=now)
+                    for book in changed if book.available_copies != logged.get(book.id, 0)
+                ], batch_size=options['batch_size'])
+        action = "Updated" if options['apply'] else "Found"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(changed)} books differing from the log at {when.isoformat()}."))
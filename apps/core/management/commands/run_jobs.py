@@ -0,0 +1,49 @@
+import multiprocessing
+import os
+import socket
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.core.jobs import requeue_stale_jobs, work
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs in a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'JOB_WORKERS', 2),
+                            help="Worker processes to start.")
+        parser.add_argument('--poll-interval', type=float, default=None, help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Exit once no job is ready instead of polling.")
+
+    def handle(self, *args, **options):
+        requeued, failed = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale jobs.")
+        if failed:
+            self.stdout.write(self.style.WARNING(f"Marked {failed} stale jobs as failed after their last attempt."))
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        if options['workers'] <= 1:
+            processed = work(f"{prefix}/0", options['once'], options['poll_interval'], requeue_stale=True)
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs."))
+            return
+        connections.close_all()
+        # The first worker also requeues stale jobs while the pool runs.
+        processes = [
+            multiprocessing.Process(
+                target=work, args=(f"{prefix}/{n}", options['once'], options['poll_interval'], n == 0),
+            )
+            for n in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+                process.join()
+        self.stdout.write(self.style.SUCCESS(f"{len(processes)} workers stopped."))
@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-19 10:12
+
+from django.core.exceptions import ValidationError
+from django.db import migrations
+
+from apps.core.isbn import normalize_isbn
+
+
+def normalize_existing_isbns(apps, schema_editor):
+    Book = apps.get_model('core', 'Book')
+    taken = set(Book.objects.values_list('isbn', flat=True))
+    for book in Book.objects.only('id', 'isbn').iterator():
+        try:
+            isbn = normalize_isbn(book.isbn)
+        except ValidationError:
+            continue
+        if isbn == book.isbn or isbn in taken:
+            continue
+        taken.discard(book.isbn)
+        taken.add(isbn)
+        Book.objects.filter(pk=book.pk).update(isbn=isbn)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_rename_category_genre_rename_category_book_genre_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_existing_isbns, migrations.RunPython.noop),
+    ]
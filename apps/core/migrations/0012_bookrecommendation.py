@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:37
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_normalize_book_isbn'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lending',
+            name='lending_date',
+            field=models.DateField(default=datetime.date.today),
+        ),
+        migrations.CreateModel(
+            name='BookRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField()),
+                ('rank', models.PositiveIntegerField()),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='core.book')),
+                ('recommended', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.book')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('book', 'rank'), name='unique_book_recommendation_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:38
+
+from itertools import islice
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_current_stock(apps, schema_editor):
+    Book = apps.get_model('core', 'Book')
+    InventoryEvent = apps.get_model('core', 'InventoryEvent')
+    now = timezone.now()
+    events = (
+        InventoryEvent(book_id=book_id, kind='ADJUST', delta=copies, occurred_at=now)
+        for book_id, copies in Book.objects.filter(available_copies__gt=0).values_list('id', 'available_copies').iterator()
+    )
+    while batch := list(islice(events, 1000)):
+        InventoryEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_bookrecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('BORROW', 'Borrow'), ('RETURN', 'Return'), ('ADJUST', 'Adjust')], max_length=10)),
+                ('delta', models.IntegerField()),
+                ('occurred_at', models.DateTimeField(db_index=True)),
+                ('book', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.book')),
+                ('lending', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.lending')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['book', 'occurred_at'], name='inventory_event_book_time')],
+            },
+        ),
+        migrations.RunPython(seed_current_stock, migrations.RunPython.noop),
+    ]
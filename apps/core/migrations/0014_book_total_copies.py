@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_inventoryevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='total_copies',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE core_book SET total_copies = available_copies + (
+                SELECT COUNT(*) FROM core_lending
+                WHERE core_lending.book_id = core_book.id AND NOT core_lending.returned
+            )
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='lending',
+            index=models.Index(condition=models.Q(('returned', False)), fields=['book'], name='lending_open_book'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_book_total_copies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Branch',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=150, unique=True)),
+                ('city', models.CharField(max_length=100)),
+                ('address', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BranchHolding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_copies', models.PositiveIntegerField(default=0)),
+                ('available_copies', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BranchTransfer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('copies', models.PositiveIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='lending',
+            name='branch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lendings', to='core.branch'),
+        ),
+        migrations.AddIndex(
+            model_name='lending',
+            index=models.Index(condition=models.Q(('returned', False)), fields=['branch'], name='lending_open_branch'),
+        ),
+        migrations.AddField(
+            model_name='branchholding',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holdings', to='core.book'),
+        ),
+        migrations.AddField(
+            model_name='branchholding',
+            name='branch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holdings', to='core.branch'),
+        ),
+        migrations.AddField(
+            model_name='branchtransfer',
+            name='book',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transfers', to='core.book'),
+        ),
+        migrations.AddField(
+            model_name='branchtransfer',
+            name='from_branch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transfers_out', to='core.branch'),
+        ),
+        migrations.AddField(
+            model_name='branchtransfer',
+            name='to_branch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transfers_in', to='core.branch'),
+        ),
+        migrations.AddIndex(
+            model_name='branchholding',
+            index=models.Index(fields=['branch', 'available_copies'], name='holding_branch_available'),
+        ),
+        migrations.AddConstraint(
+            model_name='branchholding',
+            constraint=models.UniqueConstraint(fields=('branch', 'book'), name='unique_branch_holding'),
+        ),
+    ]
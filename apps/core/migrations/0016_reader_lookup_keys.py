@@ -0,0 +1,54 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:43
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+from apps.core.phones import normalize_phone
+
+
+def backfill_phone_keys(apps, schema_editor):
+    Phone = apps.get_model('core', 'Phone')
+    batch = []
+    for phone in Phone.objects.only('id', 'phone').iterator(chunk_size=1000):
+        phone.phone_key = normalize_phone(phone.phone)
+        batch.append(phone)
+        if len(batch) == 1000:
+            Phone.objects.bulk_update(batch, ['phone_key'])
+            batch = []
+    Phone.objects.bulk_update(batch, ['phone_key'])
+
+
+def check_email_duplicates(apps, schema_editor):
+    Reader = apps.get_model('core', 'Reader')
+    duplicates = list(
+        Reader.objects.values(email_lower=Lower('email')).annotate(count=Count('id'))
+        .filter(count__gt=1).values_list('email_lower', flat=True)[:50]
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Readers share these emails when case is ignored; merge or correct them before migrating: "
+            + ", ".join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_branches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='phone',
+            name='phone_key',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=32),
+        ),
+        migrations.RunPython(backfill_phone_keys, migrations.RunPython.noop),
+        migrations.RunPython(check_email_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reader',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='unique_reader_email_lower'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_reader_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CirculationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('genre_id', models.PositiveIntegerField(default=0)),
+                ('publishing_id', models.PositiveIntegerField(default=0)),
+                ('age_band', models.CharField(choices=[('UNKNOWN', 'Unknown'), ('0-17', '0-17'), ('18-34', '18-34'), ('35-64', '35-64'), ('65+', '65+')], default='UNKNOWN', max_length=10)),
+                ('loans_opened', models.PositiveIntegerField(default=0)),
+                ('loans_closed', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'genre_id', 'publishing_id', 'age_band'), name='unique_circulation_rollup')],
+            },
+        ),
+    ]
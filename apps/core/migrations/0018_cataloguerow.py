@@ -0,0 +1,66 @@
+# Generated by Django 6.0.2 on 2026-10-19 18:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_catalogue_rows(apps, schema_editor):
+    Book = apps.get_model('core', 'Book')
+    CatalogueRow = apps.get_model('core', 'CatalogueRow')
+    now = timezone.now()
+    books = Book.objects.select_related('genre', 'publishing').prefetch_related('author').order_by('id')
+    batch = []
+    for book in books.iterator(chunk_size=1000):
+        authors = sorted(book.author.all(), key=lambda author: author.pk)
+        batch.append(CatalogueRow(
+            book_id=book.pk,
+            title=book.title,
+            author_names=", ".join(f"{author.first_name} {author.surname}".strip() for author in authors),
+            genre_id=book.genre_id,
+            genre_name=book.genre.name if book.genre else "",
+            publishing_id=book.publishing_id,
+            publishing_name=book.publishing.name if book.publishing else "",
+            isbn=book.isbn,
+            year_published=book.year_published,
+            available_copies=book.available_copies,
+            variety=book.variety,
+            created_at=book.created_at,
+            updated_at=now,
+        ))
+        if len(batch) == 1000:
+            CatalogueRow.objects.bulk_create(batch)
+            batch = []
+    CatalogueRow.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_circulationrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueRow',
+            fields=[
+                ('book', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='catalogue_row', serialize=False, to='core.book')),
+                ('title', models.CharField(max_length=200)),
+                ('author_names', models.TextField(blank=True)),
+                ('genre_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('genre_name', models.CharField(blank=True, max_length=100)),
+                ('publishing_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('publishing_name', models.CharField(blank=True, max_length=150)),
+                ('isbn', models.CharField(max_length=13)),
+                ('year_published', models.PositiveIntegerField(null=True)),
+                ('available_copies', models.PositiveIntegerField(default=0)),
+                ('variety', models.CharField(choices=[('PAPERBACK', 'Paperback'), ('E_BOOK', 'E-Book'), ('AUDIO_BOOK', 'Audiobook')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['title'], name='catalogue_row_title'), models.Index(fields=['genre_id', 'title'], name='catalogue_row_genre_title'), models.Index(fields=['isbn'], name='catalogue_row_isbn')],
+            },
+        ),
+        migrations.RunPython(backfill_catalogue_rows, migrations.RunPython.noop),
+    ]
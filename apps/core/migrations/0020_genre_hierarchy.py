@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_closure(apps, schema_editor):
+    Genre = apps.get_model('core', 'Genre')
+    GenreClosure = apps.get_model('core', 'GenreClosure')
+    GenreClosure.objects.bulk_create(
+        [GenreClosure(ancestor_id=pk, descendant_id=pk, depth=0) for pk in Genre.objects.values_list('id', flat=True)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='genre',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='core.genre'),
+        ),
+        migrations.CreateModel(
+            name='GenreClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.genre')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.genre')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='genre_closure_descendant')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_genre_closure')],
+            },
+        ),
+        migrations.RunPython(seed_closure, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-19 20:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_genre_hierarchy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoAuthorship',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('book_count', models.PositiveIntegerField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coauthorships', to='core.author')),
+                ('coauthor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.author')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('author', 'coauthor'), name='unique_coauthorship')],
+            },
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO core_coauthorship (author_id, coauthor_id, book_count)
+            SELECT a.author_id, b.author_id, COUNT(*)
+            FROM core_book_author a
+            JOIN core_book_author b ON a.book_id = b.book_id AND a.author_id <> b.author_id
+            GROUP BY a.author_id, b.author_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
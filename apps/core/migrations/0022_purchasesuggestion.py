@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-19 21:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_coauthorship'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekly_forecast', models.FloatField()),
+                ('stockout_rate', models.FloatField()),
+                ('current_copies', models.PositiveIntegerField()),
+                ('suggested_copies', models.PositiveIntegerField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='lending',
+            index=models.Index(fields=['lending_date', 'book'], name='lending_date_book'),
+        ),
+        migrations.AddField(
+            model_name='purchasesuggestion',
+            name='book',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='purchase_suggestion', to='core.book'),
+        ),
+        migrations.AddIndex(
+            model_name='purchasesuggestion',
+            index=models.Index(fields=['-suggested_copies'], name='purchase_suggested'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-19 20:10
+
+from django.db import migrations
+
+TRIGRAM_COLUMNS = ('title', 'author_names')
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('core', 'CatalogueRow')._meta.db_table)
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in TRIGRAM_COLUMNS:
+        # icontains compiles to UPPER("column"::text) LIKE UPPER(%s); index
+        # that expression so the planner can use it.
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS catalogue_row_{column}_trgm ON {table} '
+            f'USING gin ((UPPER({schema_editor.quote_name(column)}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in TRIGRAM_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS catalogue_row_{column}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_purchasesuggestion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cataloguerow',
+            name='catalogue_row_isbn',
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -1,6 +1,17 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+from contextlib import suppress
 from datetime import date
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from apps.core.catalogue import sync_catalogue_rows
+from apps.core.genres import in_subtree, insert_genre, move_subtree
+from apps.core.inventory import event_buffer
+from apps.core.isbn import normalize_isbn
+from apps.core.phones import normalize_phone
+from apps.core.pubsub import publish_availability_on_commit
 
 
 class Gender(models.IntegerChoices):
@@ -25,12 +36,52 @@ class Author(models.Model):
 class Genre(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=100, unique=True)
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_parent = instance.__dict__.get('parent_id')
+        return instance
+
+    def clean(self):
+        if self.pk and self.parent_id and in_subtree(self.parent_id, self.pk):
+            raise ValidationError({'parent': "A genre cannot be moved under itself or one of its sub-genres."})
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        self.parent_id = self._meta.get_field('parent').to_python(self.parent_id)
+        creating = self._state.adding
+        moved = not creating and self.parent_id != getattr(self, '_saved_parent', self.parent_id)
+        if moved and self.parent_id and in_subtree(self.parent_id, self.pk):
+            raise ValidationError("A genre cannot be moved under itself or one of its sub-genres.")
+        super().save(*args, **kwargs)
+        if creating:
+            insert_genre(self.pk, self.parent_id)
+        elif moved:
+            move_subtree(self.pk, self.parent_id)
+        self._saved_parent = self.parent_id
+
     def __str__(self):
         return self.name
 
+
+class GenreClosure(models.Model):
+    ancestor = models.ForeignKey(Genre, on_delete=models.CASCADE, related_name='+')
+    descendant = models.ForeignKey(Genre, on_delete=models.CASCADE, related_name='+')
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='unique_genre_closure'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='genre_closure_descendant'),
+        ]
+
+
 class Publishing(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=150, unique=True)
@@ -48,6 +99,15 @@ class Variety(models.TextChoices):
     AUDIO_BOOK = "AUDIO_BOOK", 'Audiobook'
 
 
+class InventoryEventKind(models.TextChoices):
+    BORROW = "BORROW", 'Borrow'
+    RETURN = "RETURN", 'Return'
+    ADJUST = "ADJUST", 'Adjust'
+
+
+STOCK_FIELDS = {'available_copies', 'total_copies', 'updated_at'}
+
+
 class Book(models.Model):
     id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=200)
@@ -57,13 +117,81 @@ class Book(models.Model):
     isbn = models.CharField(max_length=13, unique=True)
     year_published = models.PositiveIntegerField()
     available_copies = models.PositiveIntegerField(default=1)
+    total_copies = models.PositiveIntegerField(null=True, blank=True)
     variety = models.CharField(max_length=20,choices=Variety.choices)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_copies = instance.__dict__.get('available_copies')
+        instance._saved_total = instance.__dict__.get('total_copies')
+        return instance
+
+    def clean(self):
+        if self.isbn:
+            try:
+                self.isbn = normalize_isbn(self.isbn)
+            except ValidationError as error:
+                raise ValidationError({'isbn': error.messages})
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.isbn and (update_fields is None or 'isbn' in update_fields):
+            with suppress(ValidationError):
+                self.isbn = normalize_isbn(self.isbn)
+        saved_copies = getattr(self, '_saved_copies', 0)
+        delta = 0
+        if update_fields is None and saved_copies is not None:
+            delta = self.available_copies - saved_copies
+        if self.total_copies is None:
+            self.total_copies = self.available_copies
+        elif delta and self.total_copies == getattr(self, '_saved_total', None):
+            self.total_copies = max(self.total_copies + delta, 0)
+        super().save(*args, **kwargs)
+        if update_fields is not None and set(update_fields) <= STOCK_FIELDS:
+            CatalogueRow.objects.filter(book_id=self.pk).update(
+                available_copies=self.available_copies, updated_at=self.updated_at)
+        else:
+            sync_catalogue_rows([self.pk])
+        if delta:
+            event_buffer.record_on_commit(self.pk, InventoryEventKind.ADJUST, delta)
+            publish_availability_on_commit(self, InventoryEventKind.ADJUST, delta)
+        self._saved_copies = self.available_copies
+        self._saved_total = self.total_copies
+
     def __str__(self):
         return self.title
 
+class Branch(models.Model):
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=150, unique=True)
+    city = models.CharField(max_length=100)
+    address = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+class BranchHolding(models.Model):
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='holdings')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='holdings')
+    total_copies = models.PositiveIntegerField(default=0)
+    available_copies = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['branch', 'book'], name='unique_branch_holding'),
+        ]
+        indexes = [
+            models.Index(fields=['branch', 'available_copies'], name='holding_branch_available'),
+        ]
+
+    def __str__(self):
+        return f"{self.book} at {self.branch}: {self.available_copies}/{self.total_copies}"
+
 class Reader(models.Model):
     id = models.AutoField(primary_key=True)
     surname = models.CharField(max_length=100)
@@ -75,32 +203,120 @@ class Reader(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(Lower('email'), name='unique_reader_email_lower'),
+        ]
+
     def __str__(self):
         return f"{self.surname} {self.first_name}"
 
 class Lending(models.Model):
     reader = models.ForeignKey(Reader, on_delete=models.CASCADE, related_name='lendings')
     book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='lendings')
+    branch = models.ForeignKey(Branch, on_delete=models.SET_NULL, null=True, blank=True, related_name='lendings')
     lending_date = models.DateField(default=date.today)
     return_date = models.DateField(blank=True, null=True)
     returned = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['book'], condition=models.Q(returned=False), name='lending_open_book'),
+            models.Index(fields=['branch'], condition=models.Q(returned=False), name='lending_open_branch'),
+            models.Index(fields=['lending_date', 'book'], name='lending_date_book'),
+        ]
+
+    @transaction.atomic
     def save(self, *args, **kwargs):
+        event = None
         if not self.pk:
-            if self.book.available_copies <= 0:
+            if self.branch_id:
+                taken = BranchHolding.objects.filter(
+                    branch_id=self.branch_id, book_id=self.book_id, available_copies__gt=0
+                ).update(available_copies=F('available_copies') - 1)
+                if not taken:
+                    raise ValidationError("No available copies at this branch.")
+            elif BranchHolding.objects.filter(book_id=self.book_id).exists():
+                raise ValidationError("This book is held at branches; lend it from a branch desk.")
+            if not Book.objects.filter(pk=self.book_id, available_copies__gt=0).update(
+                available_copies=F('available_copies') - 1, updated_at=timezone.now()
+            ):
                 raise ValidationError("No available copies.")
-            self.book.available_copies -= 1
-            self.book.save()
+            self.refresh_book_stock()
+            event = (InventoryEventKind.BORROW, -1)
         else:
             old_copy = Lending.objects.filter(pk=self.pk).first()
             if not old_copy.returned and self.returned:
-                self.book.available_copies += 1
+                if self.branch_id:
+                    BranchHolding.objects.filter(
+                        branch_id=self.branch_id, book_id=self.book_id
+                    ).update(available_copies=F('available_copies') + 1)
+                Book.objects.filter(pk=self.book_id).update(
+                    available_copies=F('available_copies') + 1, updated_at=timezone.now()
+                )
+                self.refresh_book_stock()
                 self.return_date = date.today()
-                self.book.save()
+                event = (InventoryEventKind.RETURN, 1)
         super().save(*args, **kwargs)
+        if event:
+            event_buffer.record_on_commit(self.book_id, *event, lending_id=self.pk)
+            branch_available = None
+            if self.branch_id:
+                branch_available = BranchHolding.objects.filter(
+                    branch_id=self.branch_id, book_id=self.book_id
+                ).values_list('available_copies', flat=True).first()
+            publish_availability_on_commit(self.book, *event, branch_id=self.branch_id,
+                                           branch_available=branch_available)
+
+    def refresh_book_stock(self):
+        self.book.refresh_from_db(fields=['available_copies', 'updated_at'])
+        self.book._saved_copies = self.book.available_copies
+        CatalogueRow.objects.filter(book_id=self.book_id).update(
+            available_copies=self.book.available_copies, updated_at=self.book.updated_at)
+
     def __str__(self):
         return f"{self.reader} borrowed {self.book}"
 
 
+class BranchTransfer(models.Model):
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='transfers')
+    from_branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='transfers_out')
+    to_branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='transfers_in')
+    copies = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def clean(self):
+        if self.pk or not (self.book_id and self.from_branch_id):
+            return
+        if self.from_branch_id == self.to_branch_id:
+            raise ValidationError({'to_branch': "Cannot transfer to the same branch."})
+        if not BranchHolding.objects.filter(
+            branch_id=self.from_branch_id, book_id=self.book_id, available_copies__gte=self.copies
+        ).exists():
+            raise ValidationError({'copies': "Not enough available copies at the source branch."})
+
+    @transaction.atomic
+    def save(self, *args, **kwargs):
+        if not self.pk:
+            moved = BranchHolding.objects.filter(
+                branch_id=self.from_branch_id, book_id=self.book_id, available_copies__gte=self.copies
+            ).update(
+                available_copies=F('available_copies') - self.copies,
+                total_copies=F('total_copies') - self.copies,
+            )
+            if not moved:
+                raise ValidationError("Not enough available copies at the source branch.")
+            holding, _ = BranchHolding.objects.get_or_create(branch_id=self.to_branch_id, book_id=self.book_id)
+            BranchHolding.objects.filter(pk=holding.pk).update(
+                available_copies=F('available_copies') + self.copies,
+                total_copies=F('total_copies') + self.copies,
+            )
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.copies} x {self.book}: {self.from_branch} -> {self.to_branch}"
+
+
 class Phone(models.Model):
     id = models.AutoField(primary_key=True)
     reader = models.ForeignKey(
@@ -109,6 +325,14 @@ class Phone(models.Model):
         related_name='phones'
     )
     phone = models.CharField(max_length=20, unique=True)
+    phone_key = models.CharField(max_length=32, db_index=True, editable=False, default='')
+
+    def save(self, *args, **kwargs):
+        self.phone_key = normalize_phone(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_key'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.phone
@@ -133,3 +357,164 @@ class Address(models.Model):
     def __str__(self):
         return f"{self.city}, {self.street} {self.building}"
 
+
+class BookRecommendation(models.Model):
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='+')
+    score = models.PositiveIntegerField()
+    rank = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'rank'], name='unique_book_recommendation_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.book} -> {self.recommended} ({self.score})"
+
+
+class InventoryEvent(models.Model):
+    book = models.ForeignKey(Book, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    lending = models.ForeignKey(
+        Lending, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+'
+    )
+    kind = models.CharField(max_length=10, choices=InventoryEventKind.choices)
+    delta = models.IntegerField()
+    occurred_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['book', 'occurred_at'], name='inventory_event_book_time'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.delta:+d} {self.book_id}"
+
+
+class AgeBand(models.TextChoices):
+    UNKNOWN = "UNKNOWN", 'Unknown'
+    CHILD = "0-17", '0-17'
+    YOUNG = "18-34", '18-34'
+    ADULT = "35-64", '35-64'
+    SENIOR = "65+", '65+'
+
+
+class CirculationRollup(models.Model):
+    day = models.DateField()
+    # Plain ids rather than foreign keys: 0 means "none", so the unique key
+    # never contains NULLs and rollups survive genre/publisher deletion.
+    genre_id = models.PositiveIntegerField(default=0)
+    publishing_id = models.PositiveIntegerField(default=0)
+    age_band = models.CharField(max_length=10, choices=AgeBand.choices, default=AgeBand.UNKNOWN)
+    loans_opened = models.PositiveIntegerField(default=0)
+    loans_closed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'genre_id', 'publishing_id', 'age_band'], name='unique_circulation_rollup'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.genre_id}/{self.publishing_id}/{self.age_band}: +{self.loans_opened} -{self.loans_closed}"
+
+
+class CatalogueRow(models.Model):
+    book = models.OneToOneField(Book, on_delete=models.CASCADE, primary_key=True, related_name='catalogue_row')
+    title = models.CharField(max_length=200)
+    author_names = models.TextField(blank=True)
+    genre_id = models.PositiveIntegerField(null=True, blank=True)
+    genre_name = models.CharField(max_length=100, blank=True)
+    publishing_id = models.PositiveIntegerField(null=True, blank=True)
+    publishing_name = models.CharField(max_length=150, blank=True)
+    isbn = models.CharField(max_length=13)
+    year_published = models.PositiveIntegerField(null=True)
+    available_copies = models.PositiveIntegerField(default=0)
+    variety = models.CharField(max_length=20, choices=Variety.choices)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['title'], name='catalogue_row_title'),
+            models.Index(fields=['genre_id', 'title'], name='catalogue_row_genre_title'),
+        ]
+        # On PostgreSQL, migration 0023 adds trigram GIN indexes on
+        # UPPER(title) and UPPER(author_names), the expressions icontains
+        # compiles to, for the catalogue's substring search.
+
+    def __str__(self):
+        return self.title
+
+
+class JobStatus(models.TextChoices):
+    QUEUED = "QUEUED", 'Queued'
+    RUNNING = "RUNNING", 'Running'
+    DONE = "DONE", 'Done'
+    FAILED = "FAILED", 'Failed'
+
+
+class Job(models.Model):
+    task = models.CharField(max_length=100)
+    arguments = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=JobStatus.choices, default=JobStatus.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    progress = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['run_after', 'id'], name='job_queued', condition=models.Q(status='QUEUED')),
+            models.Index(fields=['status', 'updated_at'], name='job_status_updated'),
+        ]
+
+    @property
+    def percent(self):
+        if not self.progress_total:
+            return None
+        return min(100, self.progress * 100 // self.progress_total)
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class CoAuthorship(models.Model):
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='coauthorships')
+    coauthor = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='+')
+    book_count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['author', 'coauthor'], name='unique_coauthorship'),
+        ]
+
+    def __str__(self):
+        return f"{self.author_id} - {self.coauthor_id} ({self.book_count})"
+
+
+class PurchaseSuggestion(models.Model):
+    book = models.OneToOneField(Book, on_delete=models.CASCADE, related_name='purchase_suggestion')
+    weekly_forecast = models.FloatField()
+    stockout_rate = models.FloatField()
+    current_copies = models.PositiveIntegerField()
+    suggested_copies = models.PositiveIntegerField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-suggested_copies'], name='purchase_suggested'),
+        ]
+
+    def __str__(self):
+        return f"{self.book_id}: +{self.suggested_copies}"
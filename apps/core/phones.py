@@ -0,0 +1,14 @@
+from django.conf import settings
+
+
+def normalize_phone(value):
+    value = str(value).strip()
+    digits = ''.join(char for char in value if char.isdigit())
+    if value.startswith('+'):
+        return '+' + digits
+    if digits.startswith('00'):
+        return '+' + digits[2:]
+    country_code = getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '')
+    if country_code and digits:
+        return '+' + country_code + digits.lstrip('0')
+    return digits
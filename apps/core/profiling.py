@@ -0,0 +1,159 @@
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+PROFILE_NAME_RE = re.compile(r'^\d{8}-\d{6}-[0-9a-f]{8}$')
+
+
+def profile_dir():
+    return Path(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+
+
+class StackSampler:
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+class QueryRecorder:
+    def __init__(self, limit):
+        self.limit = limit
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.queries) < self.limit:
+                self.queries.append({"sql": sql, "ms": round(elapsed * 1000, 3), "many": many})
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        if request.headers.get(getattr(settings, 'PROFILING_HEADER', 'X-Profile')):
+            user = getattr(request, 'user', None)
+            return bool(user and user.is_staff)
+        for prefix, rate in getattr(settings, 'PROFILING_SAMPLE_RATES', {}).items():
+            if request.path.startswith(prefix):
+                return random.random() < rate
+        return False
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+        recorder = QueryRecorder(getattr(settings, 'PROFILING_MAX_QUERIES', 1000))
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            sampler = self.record(stack, recorder)
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        name = profile_name()
+        response['X-Profile-Id'] = name
+        # Streamed bodies are rendered while the server iterates them, so the
+        # profile is written once the stream is exhausted. Async streams (the
+        # availability feed) are open-ended and only cover the view itself.
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.profile_stream(
+                response.streaming_content, name, request, response, duration, sampler, recorder,
+            )
+        else:
+            save_profile(name, request, response, duration, sampler, recorder)
+        return response
+
+    def record(self, stack, recorder):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        interval = getattr(settings, 'PROFILING_INTERVAL', 0.005)
+        return stack.enter_context(StackSampler(threading.get_ident(), interval))
+
+    def profile_stream(self, content, name, request, response, duration, sampler, recorder):
+        started = time.perf_counter()
+        stack = ExitStack()
+        body_sampler = self.record(stack, recorder)
+        try:
+            yield from content
+        finally:
+            stack.close()
+            sampler.stacks.update(body_sampler.stacks)
+            save_profile(name, request, response, duration + time.perf_counter() - started, sampler, recorder)
+
+
+def profile_name():
+    return f"{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def save_profile(name, request, response, duration, sampler, recorder):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    folded = ''.join(f"{stack} {count}\n" for stack, count in sampler.stacks.most_common())
+    (directory / f"{name}.folded").write_text(folded)
+    (directory / f"{name}.json").write_text(json.dumps({
+        "name": name,
+        "method": request.method,
+        "path": request.get_full_path(),
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 3),
+        "interval_ms": sampler.interval * 1000,
+        "samples": sum(sampler.stacks.values()),
+        "query_count": recorder.count,
+        "query_ms": round(recorder.seconds * 1000, 3),
+        "queries": recorder.queries,
+    }, indent=2))
+    prune_profiles(directory, getattr(settings, 'PROFILING_KEEP', 200))
+
+
+def prune_profiles(directory, keep):
+    for meta in sorted(directory.glob('*.json'), reverse=True)[keep:]:
+        meta.unlink(missing_ok=True)
+        meta.with_suffix('.folded').unlink(missing_ok=True)
+
+
+def list_profiles(limit):
+    profiles = []
+    for meta in sorted(profile_dir().glob('*.json'), reverse=True)[:limit]:
+        profile = json.loads(meta.read_text())
+        profile.pop('queries', None)
+        profiles.append(profile)
+    return profiles
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+AVAILABILITY_CHANNEL = 'availability'
+
+
+class Subscription:
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=getattr(settings, 'PUBSUB_QUEUE_SIZE', 1000))
+
+    def deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if s.channel == channel]
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's event loop has been closed without unsubscribing.
+                self.unsubscribe(subscription)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(getattr(settings, 'PUBSUB_BROKER', 'apps.core.pubsub.InProcessBroker'))()
+    return _broker
+
+
+def publish_availability_on_commit(book, kind, delta, branch_id=None, branch_available=None):
+    message = json.dumps({
+        "type": kind.lower(),
+        "book_id": book.pk,
+        "title": book.title,
+        "delta": delta,
+        "available_copies": book.available_copies,
+        "branch_id": branch_id,
+        "branch_available": branch_available,
+    })
+    transaction.on_commit(lambda: get_broker().publish(AVAILABILITY_CHANNEL, message))
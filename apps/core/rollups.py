@@ -0,0 +1,82 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Coalesce, ExtractDay, ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from apps.core.models import AgeBand, CirculationRollup, InventoryEventKind, Lending
+
+
+def lending_keys():
+    return Lending.objects.alias(
+        lending_day=ExtractMonth('lending_date') * 100 + ExtractDay('lending_date'),
+        birthday=ExtractMonth('reader__birth_date') * 100 + ExtractDay('reader__birth_date'),
+    ).annotate(
+        genre_key=Coalesce('book__genre_id', 0),
+        publishing_key=Coalesce('book__publishing_id', 0),
+        # One year less when the loan falls before the reader's birthday that year.
+        reader_age=ExtractYear('lending_date') - ExtractYear('reader__birth_date') - Case(
+            When(lending_day__lt=F('birthday'), then=Value(1)), default=Value(0),
+        ),
+        age_band=Case(
+            When(reader_age__isnull=True, then=Value(AgeBand.UNKNOWN)),
+            When(reader_age__lt=18, then=Value(AgeBand.CHILD)),
+            When(reader_age__lt=35, then=Value(AgeBand.YOUNG)),
+            When(reader_age__lt=65, then=Value(AgeBand.ADULT)),
+            default=Value(AgeBand.SENIOR),
+        ),
+    )
+
+
+def add_to_rollups(counts):
+    for (day, genre_id, publishing_id, age_band, column), amount in counts.items():
+        key = {'day': day, 'genre_id': genre_id, 'publishing_id': publishing_id, 'age_band': age_band}
+        increment = {column: F(column) + amount}
+        if CirculationRollup.objects.filter(**key).update(**increment):
+            continue
+        try:
+            with transaction.atomic():
+                CirculationRollup.objects.create(**key, **{column: amount})
+        except IntegrityError:
+            CirculationRollup.objects.filter(**key).update(**increment)
+
+
+def apply_events(events):
+    columns = {InventoryEventKind.BORROW: 'loans_opened', InventoryEventKind.RETURN: 'loans_closed'}
+    events = [event for event in events if event.kind in columns and event.lending_id]
+    if not events:
+        return
+    keys = {
+        row['id']: row for row in
+        lending_keys().filter(id__in={event.lending_id for event in events})
+        .values('id', 'genre_key', 'publishing_key', 'age_band')
+    }
+    counts = Counter()
+    for event in events:
+        row = keys.get(event.lending_id)
+        if row is None:
+            continue
+        day = timezone.localdate(event.occurred_at)
+        counts[day, row['genre_key'], row['publishing_key'], row['age_band'], columns[event.kind]] += 1
+    add_to_rollups(counts)
+
+
+def rebuild_rollups():
+    totals = {}
+    grouped = (
+        ('loans_opened', lending_keys().values('lending_date', 'genre_key', 'publishing_key', 'age_band'), 'lending_date'),
+        ('loans_closed', lending_keys().filter(returned=True, return_date__isnull=False)
+         .values('return_date', 'genre_key', 'publishing_key', 'age_band'), 'return_date'),
+    )
+    for column, queryset, day_field in grouped:
+        for row in queryset.annotate(total=Count('id')).order_by():
+            key = (row[day_field], row['genre_key'], row['publishing_key'], row['age_band'])
+            rollup = totals.setdefault(key, CirculationRollup(
+                day=key[0], genre_id=key[1], publishing_id=key[2], age_band=key[3]
+            ))
+            setattr(rollup, column, row['total'])
+    with transaction.atomic():
+        CirculationRollup.objects.all().delete()
+        CirculationRollup.objects.bulk_create(totals.values(), batch_size=1000)
+    return len(totals)
@@ -0,0 +1,96 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.core.catalogue import sync_catalogue_rows
+from apps.core.coauthors import refresh_coauthorships
+from apps.core.genres import detach_subtree
+from apps.core.models import Author, Book, CatalogueRow, Genre, Publishing
+
+
+@receiver(m2m_changed, sender=Book.author.through)
+def sync_book_authors(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        instance._catalogue_book_ids = list(instance.books.values_list('id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        sync_catalogue_rows([instance.pk])
+    elif action == 'post_clear':
+        sync_catalogue_rows(instance.__dict__.pop('_catalogue_book_ids', []))
+    else:
+        sync_catalogue_rows(pk_set)
+
+
+@receiver(m2m_changed, sender=Book.author.through)
+def sync_coauthors(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('pre_remove', 'pre_clear'):
+        instance._coauthor_ids = set(affected_author_ids(instance, reverse, pk_set))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        refresh_coauthorships(instance.__dict__.pop('_coauthor_ids', set()) | affected_author_ids(instance, reverse, pk_set))
+
+
+def affected_author_ids(instance, reverse, pk_set):
+    Link = Book.author.through
+    if not reverse:
+        return set(Link.objects.filter(book_id=instance.pk).values_list('author_id', flat=True)) | set(pk_set or ())
+    book_ids = Link.objects.filter(author_id=instance.pk).values('book_id')
+    if pk_set:
+        book_ids = pk_set
+    return set(Link.objects.filter(book_id__in=book_ids).values_list('author_id', flat=True)) | {instance.pk}
+
+
+@receiver(pre_delete, sender=Book)
+def remember_book_authors(sender, instance, **kwargs):
+    instance._coauthor_ids = set(instance.author.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Book)
+def refresh_deleted_book_coauthors(sender, instance, **kwargs):
+    refresh_coauthorships(instance.__dict__.pop('_coauthor_ids', set()))
+
+
+@receiver(post_save, sender=Author)
+def sync_author_rows(sender, instance, created, **kwargs):
+    if not created:
+        sync_catalogue_rows(instance.books.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Author)
+def remember_author_books(sender, instance, **kwargs):
+    instance._catalogue_book_ids = list(instance.books.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Author)
+def sync_deleted_author_rows(sender, instance, **kwargs):
+    sync_catalogue_rows(instance.__dict__.pop('_catalogue_book_ids', []))
+
+
+@receiver(post_save, sender=Genre)
+def sync_genre_rows(sender, instance, created, **kwargs):
+    if not created:
+        CatalogueRow.objects.filter(genre_id=instance.pk).update(genre_name=instance.name, updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Genre)
+def detach_sub_genres(sender, instance, **kwargs):
+    for child_id in instance.children.values_list('id', flat=True):
+        detach_subtree(child_id)
+
+
+@receiver(post_delete, sender=Genre)
+def clear_genre_rows(sender, instance, **kwargs):
+    CatalogueRow.objects.filter(genre_id=instance.pk).update(genre_id=None, genre_name='', updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Publishing)
+def sync_publishing_rows(sender, instance, created, **kwargs):
+    if not created:
+        CatalogueRow.objects.filter(publishing_id=instance.pk).update(
+            publishing_name=instance.name, updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Publishing)
+def clear_publishing_rows(sender, instance, **kwargs):
+    CatalogueRow.objects.filter(publishing_id=instance.pk).update(
+        publishing_id=None, publishing_name='', updated_at=timezone.now())
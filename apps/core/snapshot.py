@@ -0,0 +1,240 @@
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.core.models import Book, CatalogueRow
+
+MAGIC = b'LCAT'
+VERSION = 2
+HEADER = struct.Struct('<4sHHdIIQQQQ')
+RECORD = struct.Struct('<III')
+TOKEN = struct.Struct('<IHII')
+POSTING = struct.Struct('<I')
+FIELD_SEPARATOR = '\x1f'
+SNAPSHOT_NAME = 'catalogue.snap'
+DELTA_NAME = 'catalogue.delta.json'
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def snapshot_dir():
+    return Path(getattr(settings, 'CATALOGUE_SNAPSHOT_DIR', settings.BASE_DIR / 'snapshots'))
+
+
+def catalogue_rows(queryset=None):
+    queryset = CatalogueRow.objects.all() if queryset is None else queryset
+    columns = ('book_id', 'title', 'author_names', 'genre_name', 'isbn', 'available_copies')
+    rows = queryset.order_by('book_id').values_list(*columns)
+    for book_id, title, authors, genre, isbn, available in rows.iterator(chunk_size=2000):
+        yield {"id": book_id, "title": title, "authors": authors, "genre": genre, "isbn": isbn, "available": available}
+
+
+def title_order(row):
+    return row['title'].lower(), row['id']
+
+
+def row_tokens(row):
+    return set(tokenize(f"{row['title']} {row['authors']} {row['genre']}")) | {row['isbn'].lower()}
+
+
+def write_atomic(path, write):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + '.')
+    try:
+        with os.fdopen(handle, 'wb') as target:
+            write(target)
+        os.replace(temp_name, path)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+def build_snapshot(directory=None):
+    directory = Path(directory) if directory else snapshot_dir()
+    watermark = timezone.now().timestamp()
+    postings = defaultdict(list)
+    records = bytearray()
+    count = 0
+    # Records are written in title order, so ascending offsets are search
+    # result order and a search only decodes the records it returns.
+    for row in sorted(catalogue_rows(), key=title_order):
+        offset = len(records)
+        payload = FIELD_SEPARATOR.join((row['title'], row['authors'], row['genre'], row['isbn'])).encode()
+        records += RECORD.pack(row['id'], row['available'], len(payload)) + payload
+        for token in row_tokens(row):
+            postings[token.encode()].append(offset)
+        count += 1
+
+    tokens = sorted(postings)
+    table, blob, posting_data = bytearray(), bytearray(), bytearray()
+    posting_index = 0
+    for token in tokens:
+        offsets = postings[token]
+        table += TOKEN.pack(len(blob), len(token), posting_index, len(offsets))
+        blob += token
+        posting_data += b''.join(POSTING.pack(offset) for offset in offsets)
+        posting_index += len(offsets)
+
+    records_offset = HEADER.size
+    table_offset = records_offset + len(records)
+    blob_offset = table_offset + len(table)
+    postings_offset = blob_offset + len(blob)
+
+    def write(target):
+        target.write(HEADER.pack(MAGIC, VERSION, 0, watermark, count, len(tokens),
+                                 records_offset, table_offset, blob_offset, postings_offset))
+        for section in (records, table, blob, posting_data):
+            target.write(section)
+
+    write_atomic(directory / SNAPSHOT_NAME, write)
+    delta_path = directory / DELTA_NAME
+    if delta_path.exists():
+        delta_path.unlink()
+    return count
+
+
+def build_delta(directory=None):
+    directory = Path(directory) if directory else snapshot_dir()
+    with CatalogueSnapshot(directory / SNAPSHOT_NAME) as base:
+        since = datetime.fromtimestamp(base.watermark, tz=timezone.get_current_timezone())
+        base_ids = set(base.record_ids())
+    watermark = timezone.now().timestamp()
+    upserts = list(catalogue_rows(CatalogueRow.objects.filter(updated_at__gt=since)))
+    deleted = sorted(base_ids - set(Book.objects.values_list('id', flat=True)))
+    content = json.dumps({"watermark": watermark, "upserts": upserts, "deleted": deleted}).encode()
+    write_atomic(directory / DELTA_NAME, lambda target: target.write(content))
+    return len(upserts), len(deleted)
+
+
+class CatalogueSnapshot:
+    def __init__(self, path, delta_path=None):
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.watermark, self.record_count, self.token_count, self.records_offset,
+         self.table_offset, self.blob_offset, self.postings_offset) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a catalogue snapshot: {path}")
+        self.upserts = {}
+        self.deleted = set()
+        if delta_path and Path(delta_path).exists():
+            delta = json.loads(Path(delta_path).read_bytes())
+            self.upserts = {row['id']: row for row in delta['upserts']}
+            self.deleted = set(delta['deleted'])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def token(self, index):
+        blob_start, length, _, _ = TOKEN.unpack_from(self.map, self.table_offset + index * TOKEN.size)
+        start = self.blob_offset + blob_start
+        return self.map[start:start + length]
+
+    def postings(self, index):
+        _, _, first, count = TOKEN.unpack_from(self.map, self.table_offset + index * TOKEN.size)
+        start = self.postings_offset + first * POSTING.size
+        return {offset for (offset,) in struct.iter_unpack('<I', self.map[start:start + count * POSTING.size])}
+
+    def lookup(self, token, prefix=False):
+        key = token.encode()
+        tokens = _TokenView(self)
+        index = bisect_left(tokens, key)
+        found = set()
+        while index < self.token_count:
+            current = self.token(index)
+            if current == key or (prefix and current.startswith(key)):
+                found |= self.postings(index)
+                index += 1
+                if not prefix:
+                    break
+            else:
+                break
+        return found
+
+    def record(self, offset):
+        book_id, available, length = RECORD.unpack_from(self.map, self.records_offset + offset)
+        start = self.records_offset + offset + RECORD.size
+        title, authors, genre, isbn = self.map[start:start + length].decode().split(FIELD_SEPARATOR)
+        return {"id": book_id, "title": title, "authors": authors, "genre": genre, "isbn": isbn,
+                "available": available}
+
+    def record_ids(self):
+        offset = 0
+        for _ in range(self.record_count):
+            book_id, _, length = RECORD.unpack_from(self.map, self.records_offset + offset)
+            yield book_id
+            offset += RECORD.size + length
+
+    def search(self, query, limit=50):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        matches = None
+        for position, term in enumerate(terms):
+            offsets = self.lookup(term, prefix=position == len(terms) - 1)
+            matches = offsets if matches is None else matches & offsets
+            if not matches:
+                break
+        results = []
+        for offset in sorted(matches or ()):
+            if len(results) == limit:
+                break
+            row = self.record(offset)
+            if row['id'] not in self.deleted and row['id'] not in self.upserts:
+                results.append(row)
+        for row in self.upserts.values():
+            tokens = row_tokens(row)
+            if all(term in tokens for term in terms[:-1]) and any(t.startswith(terms[-1]) for t in tokens):
+                results.append(row)
+        results.sort(key=title_order)
+        return results[:limit]
+
+
+class _TokenView:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.token_count
+
+    def __getitem__(self, index):
+        return self.snapshot.token(index)
+
+
+_kiosk_snapshot = None
+_kiosk_signature = None
+
+
+def kiosk_snapshot():
+    global _kiosk_snapshot, _kiosk_signature
+    directory = snapshot_dir()
+    path, delta_path = directory / SNAPSHOT_NAME, directory / DELTA_NAME
+    if not path.exists():
+        return None
+    signature = (path.stat().st_mtime_ns, delta_path.stat().st_mtime_ns if delta_path.exists() else None)
+    if signature != _kiosk_signature:
+        # The previous map is left for the garbage collector: other threads
+        # may still be reading from it.
+        _kiosk_snapshot, _kiosk_signature = CatalogueSnapshot(path, delta_path), signature
+    return _kiosk_snapshot
@@ -0,0 +1,33 @@
+(function () {
+    var stream = document.getElementById("availability-stream");
+    var select = document.getElementById("lend-book-select");
+    if (!stream || !select || !window.EventSource) {
+        return;
+    }
+
+    function findOption(bookId) {
+        return select.querySelector('option[value="' + bookId + '"]');
+    }
+
+    var source = new EventSource(stream.dataset.url);
+    source.addEventListener("availability", function (event) {
+        var change = JSON.parse(event.data);
+        var option = findOption(change.book_id);
+        var available = stream.dataset.branch ? change.branch_available : change.available_copies;
+        if (available === null || available === undefined) {
+            return;
+        }
+        if (available > 0 && !option) {
+            option = document.createElement("option");
+            option.value = change.book_id;
+            option.textContent = change.title;
+            select.appendChild(option);
+        }
+        if (option) {
+            option.dataset.available = available;
+            if (available <= 0 && !option.selected) {
+                option.remove();
+            }
+        }
+    });
+})();
@@ -0,0 +1,61 @@
+import gzip
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.map')
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+
+
+def is_hashed_name(name):
+    return bool(HASHED_NAME_RE.search(name))
+
+
+def accepted_encodings(header):
+    qualities = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    wildcard = qualities.pop('*', 0.0)
+    return lambda coding: qualities.get(coding, wildcard) > 0
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        for original, processed, was_processed in super().post_process(paths, dry_run, **options):
+            if processed and not dry_run and not isinstance(was_processed, Exception):
+                self.compress(processed)
+            yield original, processed, was_processed
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as source:
+            content = source.read()
+        self.write_variant(name + '.gz', gzip.compress(content, compresslevel=9, mtime=0), len(content))
+        if brotli is not None:
+            self.write_variant(name + '.br', brotli.compress(content), len(content))
+
+    def write_variant(self, name, compressed, original_size):
+        if len(compressed) >= original_size:
+            return
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(compressed))
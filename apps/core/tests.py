@@ -1,7 +1,36 @@
-from datetime import date
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import os
+import runpy
+import tempfile
+import unittest.mock
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
 
-from .models import Author, Genre, Publishing, Book, Reader, Phone, Lending, Address, Variety, Gender
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+
+from .inventory import event_buffer, stock_as_of
+from .isbn import normalize_isbn
+from .jobs import TASKS, claim_job, enqueue, heartbeat, requeue_stale_jobs, task, work
+from .models import (Author, Genre, Publishing, Book, Reader, Phone, Lending, Address, Variety, Gender, BookRecommendation,
+                     InventoryEvent, InventoryEventKind, Branch, BranchHolding, BranchTransfer,
+                     CirculationRollup, AgeBand, CatalogueRow, Job, JobStatus, GenreClosure, CoAuthorship,
+                     PurchaseSuggestion)
+from .paginators import EstimatedCountPaginator
+from .pubsub import AVAILABILITY_CHANNEL, InProcessBroker
+from .rollups import lending_keys
+from .snapshot import CatalogueSnapshot, DELTA_NAME, SNAPSHOT_NAME
+from .storage import CompressedManifestStaticFilesStorage
+from .views import availability_events, static_asset
 
 # Create your tests here.
 class AuthorModelTest(TestCase):
@@ -129,6 +158,15 @@ class BookModelTest(TestCase):
         with self.assertRaises(Book.DoesNotExist):
             Book.objects.get(id=book_id)
 
+    def test_isbn_normalized_on_save(self):
+        self.assertEqual(Book.objects.get(id=self.book.id).isbn, "9780670813025")
+
+    def test_invalid_isbn_rejected(self):
+        self.book.isbn = "0-670-81302-9"
+        with self.assertRaises(ValidationError) as raised:
+            self.book.full_clean()
+        self.assertIn("isbn", raised.exception.message_dict)
+
 
 class ReaderModelTest(TestCase):
     def setUp(self):
@@ -175,7 +213,7 @@ class LendingModelTest(TestCase):
             title="It",
             genre=self.genre,
             publishing=self.publishing,
-            isbn="06-708-13-029",
+            isbn="978-0-670-81302-5",
             year_published=1986,
             available_copies=2,
             variety=Variety.PAPERBACK
@@ -233,6 +271,11 @@ class PhoneModelTest(TestCase):
             "+380000001"
         )
 
+    def test_phone_key_normalized(self):
+        self.phone.phone = "+38 (000) 000-02"
+        self.phone.save()
+        self.assertEqual(Phone.objects.get(id=self.phone.id).phone_key, "+3800000002")
+
     def test_delete_phone(self):
         phone_id = self.phone.id
         self.phone.delete()
@@ -277,3 +320,1095 @@ class AddressModelTest(TestCase):
         self.address.delete()
         with self.assertRaises(Address.DoesNotExist):
             Address.objects.get(id=address_id)
+
+
+class AdminChangelistTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", "admin@email.com", "password")
+        self.client.force_login(self.user)
+        self.reader = Reader.objects.create(
+            surname="Johnson",
+            first_name="John",
+            last_name="Michael",
+            email="john@email.com",
+            gender=Gender.MALE
+        )
+
+    def test_changelists_open(self):
+        for model in ("author", "genre", "publishing", "book", "reader", "lending", "phone", "address",
+                      "branch", "branchholding", "branchtransfer"):
+            response = self.client.get(reverse(f"admin:core_{model}_changelist"))
+            self.assertEqual(response.status_code, 200)
+
+    def test_reader_autocomplete(self):
+        response = self.client.get(reverse("admin:autocomplete"), {
+            "term": "John",
+            "app_label": "core",
+            "model_name": "lending",
+            "field_name": "reader",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_paginator_falls_back_to_exact_count(self):
+        paginator = EstimatedCountPaginator(Reader.objects.order_by("id"), 50)
+        self.assertEqual(paginator.count, 1)
+
+
+class IsbnTest(TestCase):
+    def test_isbn10_converted_to_isbn13(self):
+        self.assertEqual(normalize_isbn("0-306-40615-2"), "9780306406157")
+
+    def test_isbn10_with_x_check_digit(self):
+        self.assertEqual(normalize_isbn("0-8044-2957-X"), "9780804429573")
+
+    def test_isbn13_hyphens_removed(self):
+        self.assertEqual(normalize_isbn("978-0-306-40615-7"), "9780306406157")
+
+    def test_bad_checksum(self):
+        with self.assertRaises(ValidationError):
+            normalize_isbn("978-0-306-40615-8")
+
+
+class IsbnLookupTest(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(
+            title="It",
+            isbn="0-670-81302-8",
+            year_published=1986,
+            available_copies=2,
+            variety=Variety.PAPERBACK
+        )
+
+    def test_batch_lookup(self):
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                reverse("isbn_lookup"),
+                data={"isbns": ["978-0-670-81302-5", "0670813028", "9780306406157", "123"]},
+                content_type="application/json",
+            )
+        results = response.json()["results"]
+        self.assertEqual([r["found"] for r in results], [True, True, False, False])
+        self.assertEqual(results[0]["book_id"], self.book.id)
+        self.assertTrue(results[1]["available"])
+        self.assertFalse(results[3]["valid"])
+
+    def test_batch_lookup_without_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(reverse("isbn_lookup"), data=["0670813028"], content_type="application/json")
+        self.assertEqual(response.json()["results"][0]["book_id"], self.book.id)
+
+    def test_rejects_non_string_items(self):
+        for payload in ([["0670813028"]], [{"isbn": "0670813028"}], [9780670813025]):
+            response = self.client.post(reverse("isbn_lookup"), data={"isbns": payload},
+                                        content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+
+    def test_lookup_by_query_string(self):
+        response = self.client.get(reverse("isbn_lookup"), {"isbn": "0670813028"})
+        self.assertEqual(response.json()["results"][0]["title"], "It")
+
+    def test_books_post_rejects_invalid_isbn(self):
+        response = self.client.post(reverse("books"), {
+            "title": "Broken",
+            "isbn": "12345",
+            "year_published": 2000,
+            "variety": Variety.PAPERBACK,
+        })
+        self.assertContains(response, "ISBN must have 10 or 13 digits")
+        self.assertFalse(Book.objects.filter(title="Broken").exists())
+
+    def test_books_post_reports_duplicate_isbn(self):
+        response = self.client.post(reverse("books"), {
+            "title": "It again",
+            "isbn": "978-0-670-81302-5",
+            "year_published": 1986,
+            "variety": Variety.PAPERBACK,
+        })
+        self.assertContains(response, "A book with this ISBN already exists.")
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_admin_form_rejects_invalid_isbn(self):
+        self.client.force_login(User.objects.create_superuser("admin", password="x"))
+        response = self.client.post(reverse("admin:core_book_add"), {
+            "title": "Broken", "isbn": "12345", "year_published": 2000,
+            "available_copies": 1, "variety": Variety.PAPERBACK,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "ISBN must have 10 or 13 digits")
+
+
+class RecommendationTest(TestCase):
+    def setUp(self):
+        isbns = ["9780306406157", "9780670813025", "9780804429573"]
+        self.books = [
+            Book.objects.create(title=f"Book {i}", isbn=isbn, year_published=2000,
+                                available_copies=5, variety=Variety.PAPERBACK)
+            for i, isbn in enumerate(isbns)
+        ]
+        self.readers = [
+            Reader.objects.create(surname=f"Reader{i}", first_name="R", last_name="R",
+                                  email=f"reader{i}@email.com")
+            for i in range(3)
+        ]
+        for reader, borrowed in zip(self.readers, [[0, 1], [0, 1, 2], [0, 2, 2]]):
+            for index in borrowed:
+                Lending.objects.create(reader=reader, book=self.books[index])
+
+    def test_build_recommendations(self):
+        call_command("build_recommendations", top=1, stdout=StringIO())
+        top = BookRecommendation.objects.get(book=self.books[1])
+        self.assertEqual(top.recommended, self.books[0])
+        self.assertEqual(top.score, 2)
+        self.assertEqual(BookRecommendation.objects.filter(book=self.books[0]).count(), 1)
+
+    def test_also_borrowed_view(self):
+        call_command("build_recommendations", stdout=StringIO())
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("also_borrowed", args=[self.books[0].id]))
+        titles = [r["title"] for r in response.json()["also_borrowed"]]
+        self.assertEqual(titles, ["Book 1", "Book 2"])
+
+
+@override_settings(INVENTORY_EVENT_FLUSH_INTERVAL=None)
+class InventoryEventTest(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book = Book.objects.create(title="It", isbn="9780670813025", year_published=1986,
+                                            available_copies=2, variety=Variety.PAPERBACK)
+        self.reader = Reader.objects.create(surname="Johnson", first_name="John", last_name="Michael",
+                                            email="john@email.com")
+
+    def tearDown(self):
+        event_buffer.flush()
+
+    def test_lending_events_are_buffered(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            lending = Lending.objects.create(reader=self.reader, book=self.book)
+        self.assertFalse(InventoryEvent.objects.filter(kind=InventoryEventKind.BORROW).exists())
+        self.assertEqual(event_buffer.flush(), 2)
+        borrow = InventoryEvent.objects.get(kind=InventoryEventKind.BORROW)
+        self.assertEqual((borrow.delta, borrow.lending_id), (-1, lending.id))
+
+    def test_failed_flush_keeps_batch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Lending.objects.create(reader=self.reader, book=self.book)
+        with unittest.mock.patch.object(InventoryEvent.objects, "bulk_create", side_effect=IntegrityError("down")):
+            with self.assertRaises(IntegrityError):
+                event_buffer.flush()
+        self.assertEqual(event_buffer.pending(), 2)
+        self.assertEqual(event_buffer.flush(), 2)
+        self.assertTrue(InventoryEvent.objects.filter(kind=InventoryEventKind.BORROW).exists())
+
+    def test_replay_rebuilds_stock(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            lending = Lending.objects.create(reader=self.reader, book=self.book)
+        after_borrow = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            lending.returned = True
+            lending.save()
+        event_buffer.flush()
+        self.assertEqual(stock_as_of(after_borrow)[self.book.id], 1)
+
+        Book.objects.filter(id=self.book.id).update(available_copies=7)
+        with self.assertRaises(CommandError):
+            call_command("replay_inventory", "--apply", stdout=StringIO())
+        call_command("replay_inventory", "--apply", "--yes", stdout=StringIO())
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 2)
+        self.assertEqual(stock_as_of(timezone.now())[self.book.id], 2)
+
+    def test_replay_to_past_records_correction(self):
+        before_borrow = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            Lending.objects.create(reader=self.reader, book=self.book)
+        event_buffer.flush()
+        call_command("replay_inventory", "--apply", "--yes", "--at", before_borrow.isoformat(), stdout=StringIO())
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 2)
+        self.assertEqual(stock_as_of(timezone.now())[self.book.id], 2)
+
+    def test_manual_edit_logged_as_adjustment(self):
+        book = Book.objects.get(id=self.book.id)
+        book.available_copies = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            book.save()
+        event_buffer.flush()
+        self.assertEqual(
+            list(InventoryEvent.objects.filter(kind=InventoryEventKind.ADJUST).values_list("delta", flat=True)),
+            [2, 3],
+        )
+
+
+class ReconcileInventoryTest(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(title="It", isbn="9780670813025", year_published=1986,
+                                        available_copies=2, variety=Variety.PAPERBACK)
+        self.reader = Reader.objects.create(surname="Johnson", first_name="John", last_name="Michael",
+                                            email="john@email.com")
+        self.lending = Lending.objects.create(reader=self.reader, book=self.book)
+
+    def test_total_copies_set_on_create(self):
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.available_copies, self.book.total_copies), (1, 2))
+
+    def test_report_without_fix(self):
+        self.lending.delete()
+        out = StringIO()
+        call_command("reconcile_inventory", workers=1, stdout=out)
+        self.assertIn("available 1, expected 2", out.getvalue())
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 1)
+
+    def test_fix_restores_stock(self):
+        self.lending.delete()
+        call_command("reconcile_inventory", "--fix", workers=1, chunk_size=1, stdout=StringIO())
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 2)
+
+    def test_consistent_stock_untouched(self):
+        out = StringIO()
+        call_command("reconcile_inventory", "--fix", workers=1, stdout=out)
+        self.assertIn("Fixed 0 mismatches", out.getvalue())
+
+
+class BranchTest(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(title="It", isbn="9780670813025", year_published=1986,
+                                        available_copies=3, variety=Variety.PAPERBACK)
+        self.reader = Reader.objects.create(surname="Johnson", first_name="John", last_name="Michael",
+                                            email="john@email.com")
+        self.central = Branch.objects.create(name="Central", city="Kyiv")
+        self.north = Branch.objects.create(name="North", city="Kyiv")
+        BranchHolding.objects.create(branch=self.central, book=self.book, total_copies=2, available_copies=2)
+        BranchHolding.objects.create(branch=self.north, book=self.book, total_copies=1, available_copies=1)
+
+    def holding(self, branch):
+        return BranchHolding.objects.get(branch=branch, book=self.book)
+
+    def test_branch_lending_and_return(self):
+        lending = Lending.objects.create(reader=self.reader, book=self.book, branch=self.north)
+        self.assertEqual(self.holding(self.north).available_copies, 0)
+        self.assertEqual(self.holding(self.central).available_copies, 2)
+        with self.assertRaises(ValidationError):
+            Lending.objects.create(reader=self.reader, book=self.book, branch=self.north)
+        lending.returned = True
+        lending.save()
+        self.assertEqual(self.holding(self.north).available_copies, 1)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 3)
+
+    def test_stale_book_instances_do_not_lose_updates(self):
+        first, second = Book.objects.get(pk=self.book.pk), Book.objects.get(pk=self.book.pk)
+        Lending.objects.create(reader=self.reader, book=first, branch=self.central)
+        Lending.objects.create(reader=self.reader, book=second, branch=self.north)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 1)
+        self.assertEqual(CatalogueRow.objects.get(book=self.book).available_copies, 1)
+
+    def test_branch_required_once_book_has_holdings(self):
+        with self.assertRaises(ValidationError):
+            Lending.objects.create(reader=self.reader, book=self.book)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 3)
+
+    def test_transfer(self):
+        BranchTransfer.objects.create(book=self.book, from_branch=self.central, to_branch=self.north, copies=2)
+        self.assertEqual(self.holding(self.central).total_copies, 0)
+        self.assertEqual(self.holding(self.north).available_copies, 3)
+        with self.assertRaises(ValidationError):
+            BranchTransfer.objects.create(book=self.book, from_branch=self.central, to_branch=self.north)
+
+    def test_admin_transfer_form_reports_missing_stock(self):
+        self.client.force_login(User.objects.create_superuser("admin", password="x"))
+        response = self.client.post(reverse("admin:core_branchtransfer_add"), {
+            "book": self.book.id, "from_branch": self.central.id, "to_branch": self.north.id, "copies": 5,
+        })
+        self.assertContains(response, "Not enough available copies at the source branch.")
+        response = self.client.post(reverse("admin:core_branchtransfer_add"), {
+            "book": self.book.id, "from_branch": self.central.id, "to_branch": self.central.id, "copies": 1,
+        })
+        self.assertContains(response, "Cannot transfer to the same branch.")
+        self.assertFalse(BranchTransfer.objects.exists())
+
+    def test_lend_page_ignores_invalid_branch(self):
+        response = self.client.get(reverse("lend"), {"branch": "abc"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context["branch"])
+
+    def test_lend_page_scoped_to_branch(self):
+        Lending.objects.create(reader=self.reader, book=self.book, branch=self.north)
+        response = self.client.get(reverse("lend"), {"branch": self.central.id})
+        self.assertEqual(list(response.context["books"]), [self.book])
+        self.assertEqual(list(response.context["lendings"]), [])
+        self.client.post(reverse("lend"), {"reader": self.reader.id, "book": self.book.id})
+        self.assertEqual(self.holding(self.central).available_copies, 1)
+
+
+class ReaderLookupTest(TestCase):
+    def setUp(self):
+        self.reader = Reader.objects.create(surname="Johnson", first_name="John", last_name="Michael",
+                                            email="John.Johnson@Email.com")
+        Phone.objects.create(reader=self.reader, phone="+38 050 123 45 67")
+        Phone.objects.create(reader=self.reader, phone="+380661112233")
+        Address.objects.create(reader=self.reader, country="Ukraine", region="Kyiv", area="Kyiv",
+                               city="Kyiv", street="Khreshchatyk", building="1")
+
+    def test_lookup_by_email_is_case_insensitive(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("reader_lookup"), {"q": "john.johnson@email.COM"})
+        data = response.json()
+        self.assertEqual(data["id"], self.reader.id)
+        self.assertEqual(len(data["phones"]), 2)
+        self.assertEqual(data["address"], "Kyiv, Khreshchatyk 1")
+
+    def test_lookup_by_phone_ignores_formatting(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("reader_lookup"), {"q": "00380501234567"})
+        self.assertEqual(response.json()["id"], self.reader.id)
+
+    @override_settings(PHONE_DEFAULT_COUNTRY_CODE="380")
+    def test_lookup_by_local_phone(self):
+        response = self.client.get(reverse("reader_lookup"), {"q": "066 111 22 33"})
+        self.assertEqual(response.json()["id"], self.reader.id)
+
+    def test_lookup_not_found(self):
+        response = self.client.get(reverse("reader_lookup"), {"q": "nobody@email.com"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_email_unique_ignoring_case(self):
+        with self.assertRaises(IntegrityError):
+            Reader.objects.create(surname="J", first_name="J", last_name="J", email="JOHN.JOHNSON@EMAIL.COM")
+
+    def test_readers_form_reports_duplicate_email(self):
+        response = self.client.post(reverse("readers"), {"surname": "J", "first_name": "J", "last_name": "J",
+                                                         "email": "JOHN.JOHNSON@EMAIL.COM"})
+        self.assertContains(response, "A reader with this email already exists.")
+        self.assertEqual(Reader.objects.count(), 1)
+
+    @override_settings(PHONE_DEFAULT_COUNTRY_CODE="380")
+    def test_phone_key_fits_longest_phone_with_country_code(self):
+        phone = Phone.objects.create(reader=self.reader, phone="1" * 20)
+        self.assertLessEqual(len(phone.phone_key), Phone._meta.get_field("phone_key").max_length)
+
+
+class StaticAssetTest(TestCase):
+    def setUp(self):
+        self.static_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.static_root.cleanup)
+        self.css = b"body { background: #f4f6f9; }\n" * 50
+        Path(self.static_root.name, "site.0123456789ab.css").write_bytes(self.css)
+
+    def test_storage_writes_gzip_variant(self):
+        storage = CompressedManifestStaticFilesStorage(location=self.static_root.name)
+        storage.compress("site.0123456789ab.css")
+        compressed = Path(self.static_root.name, "site.0123456789ab.css.gz").read_bytes()
+        self.assertEqual(gzip.decompress(compressed), self.css)
+
+    def test_serves_precompressed_asset_with_cache_headers(self):
+        CompressedManifestStaticFilesStorage(location=self.static_root.name).compress("site.0123456789ab.css")
+        request = RequestFactory().get("/static/site.0123456789ab.css", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        with override_settings(STATIC_ROOT=self.static_root.name):
+            response = static_asset(request, "site.0123456789ab.css")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Content-Type"], "text/css")
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), self.css)
+
+    def test_respects_refused_encodings(self):
+        CompressedManifestStaticFilesStorage(location=self.static_root.name).compress("site.0123456789ab.css")
+        request = RequestFactory().get("/static/site.0123456789ab.css", HTTP_ACCEPT_ENCODING="gzip;q=0, br;q=0")
+        with override_settings(STATIC_ROOT=self.static_root.name):
+            response = static_asset(request, "site.0123456789ab.css")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(b"".join(response.streaming_content), self.css)
+
+    def test_unhashed_assets_are_revalidated(self):
+        Path(self.static_root.name, "site.css").write_bytes(self.css)
+        request = RequestFactory().get("/static/site.css")
+        with override_settings(STATIC_ROOT=self.static_root.name):
+            response = static_asset(request, "site.css")
+        self.assertNotIn("immutable", response["Cache-Control"])
+        response.close()
+
+    def test_manifest_storage_selected_by_environment(self):
+        def backend(**environ):
+            environ = {**{k: v for k, v in os.environ.items() if not k.startswith("LIBRARY_")}, **environ}
+            with unittest.mock.patch.dict(os.environ, environ, clear=True):
+                storages = runpy.run_path(str(settings.BASE_DIR / "config" / "settings.py"))["STORAGES"]
+            return storages["staticfiles"]["BACKEND"]
+        self.assertEqual(backend(), "django.contrib.staticfiles.storage.StaticFilesStorage")
+        self.assertEqual(backend(LIBRARY_STATIC_MANIFEST="1"),
+                         "apps.core.storage.CompressedManifestStaticFilesStorage")
+
+    def test_pages_link_stylesheets_instead_of_inlining(self):
+        response = self.client.get(reverse("books"))
+        self.assertContains(response, "core/css/forms.css")
+        self.assertNotContains(response, "<style>")
+
+
+class StreamingListTest(TestCase):
+    def setUp(self):
+        author = Author.objects.create(surname="King", first_name="Stephen", last_name="Edwin")
+        for i, isbn in enumerate(["9780306406157", "9780670813025", "9780804429573"]):
+            book = Book.objects.create(title=f"Book {i}", isbn=isbn, year_published=2000,
+                                       available_copies=1, variety=Variety.PAPERBACK)
+            book.author.add(author)
+            Reader.objects.create(surname=f"Reader{i}", first_name="R", last_name="R",
+                                  email=f"reader{i}@email.com")
+
+    def test_books_streamed_in_chunks(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("books"), {"stream": 1})
+            chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertTrue(response.streaming)
+        self.assertIn("<table>", chunks[0])
+        self.assertNotIn("Book 0", chunks[0])
+        body = "".join(chunks)
+        self.assertLess(body.index("Book 0"), body.index("Book 2"))
+        self.assertIn("Stephen King", body)
+        self.assertIn("</html>", chunks[-1])
+
+    async def test_books_streamed_asynchronously_under_asgi(self):
+        response = await self.async_client.get(reverse("books"), {"stream": 1})
+        self.assertTrue(response.is_async)
+        chunks = [chunk.decode() async for chunk in response.streaming_content]
+        self.assertNotIn("Book 0", chunks[0])
+        body = "".join(chunks)
+        self.assertLess(body.index("Book 0"), body.index("Book 2"))
+        self.assertIn("</html>", chunks[-1])
+
+    def test_readers_streamed(self):
+        response = self.client.get(reverse("readers"), {"stream": 1})
+        body = b"".join(response.streaming_content).decode()
+        self.assertIn("reader2@email.com", body)
+        self.assertNotIn("stream-rows", body)
+
+    def test_regular_list_still_rendered(self):
+        response = self.client.get(reverse("books"))
+        self.assertFalse(response.streaming)
+        self.assertContains(response, "Book 1")
+
+
+@override_settings(INVENTORY_EVENT_FLUSH_INTERVAL=None)
+class CirculationRollupTest(TestCase):
+    def setUp(self):
+        self.genre = Genre.objects.create(name="Horror")
+        self.book = Book.objects.create(title="It", isbn="9780670813025", year_published=1986, genre=self.genre,
+                                        available_copies=2, variety=Variety.PAPERBACK)
+        self.reader = Reader.objects.create(surname="Johnson", first_name="John", last_name="Michael",
+                                            email="john@email.com", birth_date=date(date.today().year - 20, 1, 1))
+
+    def tearDown(self):
+        event_buffer.flush()
+
+    def lend_and_return(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            lending = Lending.objects.create(reader=self.reader, book=self.book)
+        with self.captureOnCommitCallbacks(execute=True):
+            lending.returned = True
+            lending.save()
+
+    def test_rollups_updated_on_flush(self):
+        self.lend_and_return()
+        self.lend_and_return()
+        event_buffer.flush()
+        rollup = CirculationRollup.objects.get()
+        self.assertEqual((rollup.genre_id, rollup.publishing_id, rollup.age_band), (self.genre.id, 0, AgeBand.YOUNG))
+        self.assertEqual((rollup.loans_opened, rollup.loans_closed), (2, 2))
+
+    def test_age_band_counts_birthdays_not_yet_reached(self):
+        self.reader.birth_date = date(2008, 12, 31)
+        self.reader.save()
+        Lending.objects.create(reader=self.reader, book=self.book, lending_date=date(2026, 6, 1))
+        Lending.objects.create(reader=self.reader, book=self.book, lending_date=date(2026, 12, 31))
+        bands = lending_keys().order_by('lending_date').values_list('age_band', flat=True)
+        self.assertEqual(list(bands), [AgeBand.CHILD, AgeBand.YOUNG])
+
+    def test_backfill_matches_incremental(self):
+        self.lend_and_return()
+        Lending.objects.create(reader=self.reader, book=self.book)
+        call_command("backfill_rollups", stdout=StringIO())
+        rollup = CirculationRollup.objects.get()
+        self.assertEqual((rollup.loans_opened, rollup.loans_closed), (2, 1))
+
+    def test_report_reads_rollups(self):
+        self.lend_and_return()
+        event_buffer.flush()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("circulation_report"), {"period": "week", "by": "genre"})
+        self.assertEqual(response.context["rows"][0]["label"], "Horror")
+        self.assertEqual(response.context["rows"][0]["opened"], 1)
+        response = self.client.get(reverse("circulation_report"), {"by": "age_band"})
+        self.assertEqual(response.context["rows"][0]["label"], "18-34")
+
+
+class BulkEntryTest(TestCase):
+    def formset_data(self, prefix_rows):
+        data = {
+            "form-TOTAL_FORMS": str(len(prefix_rows)),
+            "form-INITIAL_FORMS": "0",
+            "form-MIN_NUM_FORMS": "0",
+            "form-MAX_NUM_FORMS": "500",
+        }
+        for i, row in enumerate(prefix_rows):
+            for key, value in row.items():
+                data[f"form-{i}-{key}"] = value
+        return data
+
+    def test_books_created_in_one_batch(self):
+        genre = Genre.objects.create(name="Horror")
+        rows = [
+            {"title": "It", "isbn": "0-670-81302-8", "year_published": "1986", "available_copies": "2",
+             "variety": Variety.PAPERBACK, "genre_id": str(genre.id), "author": "Stephen King"},
+            {"title": "Other", "isbn": "978-0-306-40615-7", "year_published": "1990", "available_copies": "1",
+             "variety": Variety.E_BOOK, "author": "Stephen King"},
+            {"available_copies": "1"},
+        ]
+        response = self.client.post(reverse("books_bulk") + "?rows=3", self.formset_data(rows))
+        self.assertRedirects(response, reverse("books_bulk") + "?rows=3")
+        book = Book.objects.get(isbn="9780670813025")
+        self.assertEqual((book.genre, book.total_copies), (genre, 2))
+        self.assertEqual(Author.objects.get().books.count(), 2)
+
+    def test_duplicate_isbn_rejects_whole_batch(self):
+        Book.objects.create(title="It", isbn="9780670813025", year_published=1986, variety=Variety.PAPERBACK)
+        rows = [
+            {"title": "New", "isbn": "978-0-306-40615-7", "year_published": "1990", "available_copies": "1",
+             "variety": Variety.PAPERBACK},
+            {"title": "Again", "isbn": "0670813028", "year_published": "1986", "available_copies": "1",
+             "variety": Variety.PAPERBACK},
+        ]
+        response = self.client.post(reverse("books_bulk"), self.formset_data(rows))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Already exists.")
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_readers_bulk_checks_email_case_insensitively(self):
+        Reader.objects.create(surname="A", first_name="A", last_name="A", email="a@email.com")
+        rows = [
+            {"surname": "B", "first_name": "B", "last_name": "B", "email": "b@email.com", "gender": "0"},
+            {"surname": "C", "first_name": "C", "last_name": "C", "email": "B@email.com", "gender": "0"},
+        ]
+        response = self.client.post(reverse("readers_bulk"), self.formset_data(rows))
+        self.assertContains(response, "Duplicate value in this batch.")
+        rows[1]["email"] = "c@email.com"
+        response = self.client.post(reverse("readers_bulk"), self.formset_data(rows))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Reader.objects.count(), 3)
+
+    def test_authors_bulk_page_renders(self):
+        response = self.client.get(reverse("authors_bulk"), {"rows": 5})
+        self.assertEqual(len(response.context["formset"].forms), 5)
+
+    def test_single_author_post_redirects(self):
+        response = self.client.post(reverse("authors"), {"surname": "King", "first_name": "Stephen",
+                                                         "last_name": "Edwin", "gender": "1"})
+        self.assertRedirects(response, reverse("authors"))
+
+
+class AvailabilityStreamTest(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(title="It", isbn="9780670813025", year_published=1986,
+                                        available_copies=2, variety=Variety.PAPERBACK)
+        self.reader = Reader.objects.create(surname="Johnson", first_name="John", last_name="Michael",
+                                            email="john@email.com")
+        self.branch = Branch.objects.create(name="Central", city="Kyiv")
+
+    def test_broker_delivers_to_subscribers(self):
+        async def scenario():
+            broker = InProcessBroker()
+            subscription = broker.subscribe(AVAILABILITY_CHANNEL)
+            broker.publish(AVAILABILITY_CHANNEL, "hello")
+            broker.publish("other", "ignored")
+            message = await subscription.get(timeout=1)
+            subscription.close()
+            return message
+        self.assertEqual(asyncio.run(scenario()), "hello")
+
+    def test_lending_publishes_delta_on_commit(self):
+        broker = unittest.mock.Mock()
+        with unittest.mock.patch("apps.core.pubsub.get_broker", return_value=broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                Lending.objects.create(reader=self.reader, book=self.book)
+        channel, message = broker.publish.call_args.args
+        change = json.loads(message)
+        self.assertEqual(channel, AVAILABILITY_CHANNEL)
+        self.assertEqual((change["type"], change["delta"], change["available_copies"]), ("borrow", -1, 1))
+
+    def test_broker_drops_subscriptions_of_closed_loops(self):
+        broker = InProcessBroker()
+        loop = asyncio.new_event_loop()
+        subscription = loop.run_until_complete(self._subscribe(broker))
+        loop.close()
+        broker.publish(AVAILABILITY_CHANNEL, "hello")
+        self.assertNotIn(subscription, broker._subscriptions)
+
+    async def _subscribe(self, broker):
+        return broker.subscribe(AVAILABILITY_CHANNEL)
+
+    def test_lending_publishes_branch_count(self):
+        BranchHolding.objects.create(branch=self.branch, book=self.book, total_copies=2, available_copies=2)
+        broker = unittest.mock.Mock()
+        with unittest.mock.patch("apps.core.pubsub.get_broker", return_value=broker):
+            with self.captureOnCommitCallbacks(execute=True):
+                Lending.objects.create(reader=self.reader, book=self.book, branch=self.branch)
+        change = json.loads(broker.publish.call_args.args[1])
+        self.assertEqual((change["branch_id"], change["branch_available"]), (self.branch.id, 1))
+
+    def test_stream_requires_asgi(self):
+        response = self.client.get(reverse("availability_stream"))
+        self.assertEqual(response.status_code, 501)
+
+    def test_stream_filters_by_branch_and_sends_heartbeats(self):
+        async def scenario():
+            broker = InProcessBroker()
+            subscription = broker.subscribe(AVAILABILITY_CHANNEL)
+            events = availability_events(subscription, branch_id=self.branch.id, heartbeat=0.01)
+            received = [await anext(events)]
+            broker.publish(AVAILABILITY_CHANNEL, json.dumps({"branch_id": self.branch.id + 1}))
+            broker.publish(AVAILABILITY_CHANNEL, json.dumps({"branch_id": self.branch.id}))
+            received.append(await anext(events))
+            received.append(await anext(events))
+            await events.aclose()
+            return received
+        retry, event, heartbeat = asyncio.run(scenario())
+        self.assertTrue(retry.startswith("retry:"))
+        self.assertIn(f'"branch_id": {self.branch.id}}}', event)
+        self.assertEqual(heartbeat, ": keep-alive\n\n")
+
+
+class PurgeReadersTest(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(title="It", isbn="9780670813025", year_published=1986,
+                                        available_copies=3, variety=Variety.PAPERBACK)
+        self.branch = Branch.objects.create(name="Central", city="Kyiv")
+        BranchHolding.objects.create(branch=self.branch, book=self.book, total_copies=3, available_copies=3)
+        self.readers = []
+        for i in range(3):
+            reader = Reader.objects.create(surname=f"Reader{i}", first_name="R", last_name="R",
+                                           email=f"reader{i}@email.com", birth_date=date(1990, 1, 1))
+            Phone.objects.create(reader=reader, phone=f"+38000000000{i}")
+            Lending.objects.create(reader=reader, book=self.book, branch=self.branch)
+            self.readers.append(reader)
+
+    def test_purge_in_chunks_restores_stock(self):
+        ids = ",".join(str(reader.id) for reader in self.readers[:2])
+        out = StringIO()
+        call_command("purge_readers", ids=ids, chunk_size=1, stdout=out)
+        self.assertIn("Purged 2 readers", out.getvalue())
+        self.assertEqual(list(Reader.objects.values_list("id", flat=True)), [self.readers[2].id])
+        self.assertEqual(Lending.objects.count(), 1)
+        self.assertEqual(Phone.objects.count(), 1)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.available_copies, 2)
+        self.assertEqual(BranchHolding.objects.get().available_copies, 2)
+
+    def test_anonymize_keeps_history(self):
+        reader = self.readers[0]
+        call_command("purge_readers", "--anonymize", ids=str(reader.id), stdout=StringIO())
+        reader.refresh_from_db()
+        self.assertEqual(reader.email, f"anonymized-{reader.id}@invalid")
+        self.assertIsNone(reader.birth_date)
+        self.assertFalse(reader.phones.exists())
+        self.assertEqual(reader.lendings.count(), 1)
+
+    def test_selection_required(self):
+        with self.assertRaises(CommandError):
+            call_command("purge_readers", stdout=StringIO())
+
+
+class CatalogueSnapshotTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        genre = Genre.objects.create(name="Horror")
+        self.author = Author.objects.create(surname="King", first_name="Stephen", last_name="Edwin")
+        self.it = Book.objects.create(title="It", isbn="9780670813025", year_published=1986, genre=genre,
+                                      available_copies=2, variety=Variety.PAPERBACK)
+        self.it.author.add(self.author)
+        self.misery = Book.objects.create(title="Misery", isbn="9780306406157", year_published=1987,
+                                          available_copies=1, variety=Variety.PAPERBACK)
+        self.misery.author.add(self.author)
+
+    def open_snapshot(self):
+        path = Path(self.directory.name)
+        snapshot = CatalogueSnapshot(path / SNAPSHOT_NAME, path / DELTA_NAME)
+        self.addCleanup(snapshot.close)
+        return snapshot
+
+    def export(self, *args):
+        call_command("export_catalogue", *args, output=self.directory.name, stdout=StringIO())
+
+    def test_search_by_author_title_prefix_and_isbn(self):
+        self.export()
+        snapshot = self.open_snapshot()
+        self.assertEqual([r["title"] for r in snapshot.search("stephen king")], ["It", "Misery"])
+        self.assertEqual([r["title"] for r in snapshot.search("king mis")], ["Misery"])
+        self.assertEqual(snapshot.search("9780670813025")[0]["available"], 2)
+        self.assertEqual(snapshot.search("horror misery"), [])
+
+    def test_search_decodes_only_the_returned_records(self):
+        carrie = Book.objects.create(title="Carrie", isbn="9780804429573", year_published=1974,
+                                     available_copies=1, variety=Variety.PAPERBACK)
+        carrie.author.add(self.author)
+        self.export()
+        snapshot = self.open_snapshot()
+        with unittest.mock.patch.object(snapshot, "record", wraps=snapshot.record) as record:
+            results = snapshot.search("king", limit=2)
+        self.assertEqual([r["title"] for r in results], ["Carrie", "It"])
+        self.assertEqual(record.call_count, 2)
+
+    def test_delta_applies_changes_and_deletions(self):
+        self.export()
+        self.it.title = "It (Anniversary)"
+        self.it.save()
+        self.misery.delete()
+        self.export("--delta")
+        snapshot = self.open_snapshot()
+        self.assertEqual([r["title"] for r in snapshot.search("king")], ["It (Anniversary)"])
+        self.assertEqual(snapshot.search("anniv")[0]["id"], self.it.id)
+
+    def test_kiosk_search_without_database_queries(self):
+        self.export()
+        with self.settings(CATALOGUE_SNAPSHOT_DIR=Path(self.directory.name)), self.assertNumQueries(0):
+            response = self.client.get(reverse("kiosk_search"), {"q": "misery"})
+        self.assertEqual([r["title"] for r in response.context["results"]], ["Misery"])
+
+    def test_kiosk_without_snapshot(self):
+        with self.settings(CATALOGUE_SNAPSHOT_DIR=Path(self.directory.name) / "missing"):
+            response = self.client.get(reverse("kiosk_search"), {"q": "it"})
+        self.assertEqual(response.status_code, 503)
+
+
+class CatalogueRowTest(TestCase):
+    def setUp(self):
+        self.genre = Genre.objects.create(name="Horror")
+        self.publishing = Publishing.objects.create(name="Viking", country="USA", city="New York")
+        self.author = Author.objects.create(surname="King", first_name="Stephen", last_name="Edwin")
+        self.book = Book.objects.create(title="It", isbn="9780670813025", year_published=1986, available_copies=2,
+                                        variety=Variety.PAPERBACK, genre=self.genre, publishing=self.publishing)
+        self.book.author.add(self.author)
+        self.reader = Reader.objects.create(surname="Doe", first_name="John", last_name="Smith",
+                                            email="john@email.com")
+
+    def row(self):
+        return CatalogueRow.objects.get(book=self.book)
+
+    def test_row_follows_book_and_relations(self):
+        row = self.row()
+        self.assertEqual((row.title, row.author_names, row.genre_name, row.publishing_name),
+                         ("It", "Stephen King", "Horror", "Viking"))
+        self.genre.name = "Fiction"
+        self.genre.save()
+        self.author.first_name = "S."
+        self.author.save()
+        self.assertEqual((self.row().genre_name, self.row().author_names), ("Fiction", "S. King"))
+        self.book.author.clear()
+        self.assertEqual(self.row().author_names, "")
+        self.publishing.delete()
+        self.assertEqual((self.row().publishing_id, self.row().publishing_name), (None, ""))
+
+    @override_settings(INVENTORY_EVENT_FLUSH_INTERVAL=None)
+    def test_lending_updates_availability(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Lending.objects.create(book=self.book, reader=self.reader)
+        self.assertEqual(self.row().available_copies, 1)
+        event_buffer.flush()
+
+    def test_reverse_author_changes(self):
+        other = Book.objects.create(title="Misery", isbn="9780306406157", year_published=1987,
+                                    available_copies=1, variety=Variety.PAPERBACK)
+        self.author.books.add(other)
+        self.assertEqual(CatalogueRow.objects.get(book=other).author_names, "Stephen King")
+        self.author.delete()
+        self.assertEqual(CatalogueRow.objects.filter(author_names="").count(), 2)
+
+    def test_books_list_searches_rows(self):
+        Book.objects.create(title="Dune", isbn="9780306406157", year_published=1965,
+                            available_copies=1, variety=Variety.PAPERBACK)
+        response = self.client.get(reverse("books"), {"q": "king"})
+        self.assertEqual([row.title for row in response.context["book_list"]], ["It"])
+        self.assertContains(response, "Stephen King")
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        self.calls = []
+
+        @task('test_count')
+        def count(context, total=3):
+            for done in range(1, total + 1):
+                context.progress(done, total, f"step {done}")
+            self.calls.append(total)
+            return {"counted": total}
+
+        @task('test_fail')
+        def fail(context):
+            raise RuntimeError("boom")
+
+        self.addCleanup(TASKS.pop, 'test_count')
+        self.addCleanup(TASKS.pop, 'test_fail')
+
+    def test_worker_runs_job_and_reports_progress(self):
+        job = enqueue('test_count', total=4)
+        self.assertEqual(work('test', once=True), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress, job.percent, job.result), (JobStatus.DONE, 4, 100, {"counted": 4}))
+        self.assertEqual(self.calls, [4])
+
+    @override_settings(JOB_RETRY_DELAY=0)
+    def test_failed_job_is_retried_then_marked_failed(self):
+        job = enqueue('test_fail', max_attempts=2)
+        work('test', once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertIn("RuntimeError: boom", job.error)
+
+    def test_heartbeat_touches_running_job(self):
+        job = enqueue('test_count')
+        Job.objects.filter(pk=job.pk).update(status=JobStatus.RUNNING, updated_at=timezone.now() - timedelta(hours=2))
+        stop = unittest.mock.Mock(wait=unittest.mock.Mock(side_effect=[False, True]))
+        heartbeat(job.pk, stop, 60)
+        job.refresh_from_db()
+        self.assertGreater(job.updated_at, timezone.now() - timedelta(minutes=1))
+
+    def test_stale_jobs_requeued_until_out_of_attempts(self):
+        retry = enqueue('test_count', max_attempts=3)
+        spent = enqueue('test_count', max_attempts=3)
+        stale = timezone.now() - timedelta(hours=2)
+        Job.objects.filter(pk=retry.pk).update(status=JobStatus.RUNNING, attempts=1, updated_at=stale)
+        Job.objects.filter(pk=spent.pk).update(status=JobStatus.RUNNING, attempts=3, updated_at=stale)
+        self.assertEqual(requeue_stale_jobs(), (1, 1))
+        retry.refresh_from_db()
+        spent.refresh_from_db()
+        self.assertEqual((retry.status, spent.status), (JobStatus.QUEUED, JobStatus.FAILED))
+
+    @override_settings(JOB_STALE_AFTER=0)
+    def test_worker_requeues_stale_jobs_while_running(self):
+        job = enqueue('test_count')
+        Job.objects.filter(pk=job.pk).update(status=JobStatus.RUNNING, attempts=1,
+                                             updated_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(work('test', once=True), 0)
+        self.assertEqual(work('test', once=True, requeue_stale=True), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (JobStatus.DONE, 2))
+
+    def test_future_jobs_are_not_claimed(self):
+        enqueue('test_count', run_after=timezone.now() + timedelta(minutes=5))
+        self.assertIsNone(claim_job('test'))
+
+    def test_unknown_task_rejected(self):
+        with self.assertRaises(KeyError):
+            enqueue('no_such_task')
+
+    def test_status_page_queues_jobs_for_staff(self):
+        self.assertEqual(self.client.get(reverse("jobs")).status_code, 302)
+        self.client.force_login(User.objects.create_user("staff", password="x", is_staff=True))
+        response = self.client.post(reverse("jobs"), {"task": "test_count"}, follow=True)
+        job = Job.objects.get()
+        self.assertContains(response, f"job #{job.pk}")
+        work('test', once=True)
+        status = self.client.get(reverse("job_status", args=[job.pk])).json()
+        self.assertEqual((status["status"], status["percent"], status["message"]), ("DONE", 100, "step 3"))
+
+
+class GenreHierarchyTest(TestCase):
+    def setUp(self):
+        self.fiction = Genre.objects.create(name="Fiction")
+        self.scifi = Genre.objects.create(name="Science Fiction", parent=self.fiction)
+        self.space = Genre.objects.create(name="Space Opera", parent=self.scifi)
+        self.history = Genre.objects.create(name="History")
+
+    def closure(self):
+        return set(GenreClosure.objects.values_list('ancestor__name', 'descendant__name', 'depth'))
+
+    def test_closure_rows_on_insert(self):
+        self.assertIn(("Fiction", "Space Opera", 2), self.closure())
+        self.assertEqual(GenreClosure.objects.filter(descendant=self.space).count(), 3)
+
+    def test_move_subtree(self):
+        self.scifi.parent = self.history
+        self.scifi.save()
+        closure = self.closure()
+        self.assertIn(("History", "Space Opera", 2), closure)
+        self.assertNotIn(("Fiction", "Space Opera", 2), closure)
+        self.assertEqual(GenreClosure.objects.count(), 7)
+
+    def test_cannot_move_under_own_subtree(self):
+        self.fiction.parent = self.space
+        with self.assertRaises(ValidationError):
+            self.fiction.save()
+
+    def test_move_view_rejects_invalid_ids(self):
+        response = self.client.post(reverse("genres"), {"action": "move", "genre": self.scifi.id, "parent": "x"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(reverse("genres"), {"name": "Sub", "parent": 999})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Genre.objects.filter(name="Sub").exists())
+
+    def test_saving_with_unchanged_string_parent_keeps_closure(self):
+        genre = Genre.objects.get(pk=self.scifi.pk)
+        genre.parent_id = str(self.fiction.id)
+        with unittest.mock.patch("apps.core.models.move_subtree") as move:
+            genre.save()
+        move.assert_not_called()
+
+    def test_deleting_genre_detaches_children(self):
+        self.scifi.delete()
+        self.space.refresh_from_db()
+        self.assertIsNone(self.space.parent)
+        self.assertEqual(GenreClosure.objects.filter(descendant=self.space).count(), 1)
+
+    def test_books_filtered_by_subtree(self):
+        for title, genre, isbn in [("Dune", self.space, "9780306406157"), ("Emma", self.fiction, "9780670813025"),
+                                   ("SPQR", self.history, "9780804429573")]:
+            Book.objects.create(title=title, genre=genre, isbn=isbn, year_published=2000,
+                                available_copies=1, variety=Variety.PAPERBACK)
+        response = self.client.get(reverse("books"), {"genre": self.fiction.id})
+        self.assertEqual([row.title for row in response.context["book_list"]], ["Dune", "Emma"])
+        response = self.client.get(reverse("books"), {"genre": self.scifi.id})
+        self.assertEqual([row.title for row in response.context["book_list"]], ["Dune"])
+
+
+class CoAuthorGraphTest(TestCase):
+    def setUp(self):
+        self.a, self.b, self.c, self.d = [
+            Author.objects.create(surname=name, first_name="X", last_name="Y") for name in "ABCD"
+        ]
+        self.first = self.book("First", "9780306406157", self.a, self.b)
+        self.second = self.book("Second", "9780670813025", self.b, self.c)
+        self.third = self.book("Third", "9780804429573", self.c, self.d)
+
+    def book(self, title, isbn, *authors):
+        book = Book.objects.create(title=title, isbn=isbn, year_published=2000,
+                                   available_copies=1, variety=Variety.PAPERBACK)
+        book.author.add(*authors)
+        return book
+
+    def links(self):
+        return set(CoAuthorship.objects.values_list('author__surname', 'coauthor__surname', 'book_count'))
+
+    def test_adjacency_follows_link_changes(self):
+        self.assertIn(("A", "B", 1), self.links())
+        self.assertIn(("B", "A", 1), self.links())
+        self.a.books.add(self.second)
+        self.assertIn(("A", "C", 1), self.links())
+        self.assertIn(("B", "A", 2), self.links())
+        self.second.author.remove(self.a)
+        self.assertIn(("B", "A", 1), self.links())
+        self.assertNotIn(("C", "A", 1), self.links())
+        self.third.delete()
+        self.assertFalse(CoAuthorship.objects.filter(author=self.d).exists())
+        self.first.author.clear()
+        self.assertEqual(self.links(), {("B", "C", 1), ("C", "B", 1)})
+
+    def test_graph_endpoint_hops(self):
+        url = reverse("coauthor_network", args=[self.a.id])
+        one = self.client.get(url).json()
+        self.assertEqual([node["id"] for node in one["nodes"]], [self.a.id, self.b.id])
+        three = self.client.get(url, {"hops": 3}).json()
+        self.assertEqual({node["id"]: node["hops"] for node in three["nodes"]},
+                         {self.a.id: 0, self.b.id: 1, self.c.id: 2, self.d.id: 3})
+        self.assertEqual(len(three["edges"]), 3)
+
+    def test_author_detail_bibliography(self):
+        response = self.client.get(reverse("author_detail", args=[self.b.id]))
+        self.assertEqual([row.title for row in response.context["page"]], ["First", "Second"])
+        self.assertEqual({link.coauthor_id for link in response.context["coauthors"]}, {self.a.id, self.c.id})
+        self.assertEqual(self.client.get(reverse("author_detail", args=[999])).status_code, 404)
+
+
+class DatabaseProfileTest(TestCase):
+    def database(self, **environ):
+        environ = {**{k: v for k, v in os.environ.items() if not k.startswith("LIBRARY_")}, **environ}
+        with unittest.mock.patch.dict(os.environ, environ, clear=True):
+            return runpy.run_path(str(settings.BASE_DIR / "config" / "settings.py"))["DATABASES"]["default"]
+
+    def test_sqlite_profile(self):
+        database = self.database(LIBRARY_DATABASE="sqlite", LIBRARY_SQLITE_PATH="/tmp/branch.sqlite3")
+        self.assertEqual((database["ENGINE"], database["NAME"]), ("django.db.backends.sqlite3", "/tmp/branch.sqlite3"))
+        self.assertEqual(database["OPTIONS"]["transaction_mode"], "IMMEDIATE")
+        self.assertIn("PRAGMA journal_mode=WAL", database["OPTIONS"]["init_command"])
+
+    def test_postgresql_is_default(self):
+        self.assertEqual(self.database()["ENGINE"], "django.db.backends.postgresql")
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        middleware = settings.MIDDLEWARE + ["apps.core.profiling.ProfilingMiddleware"]
+        self.override = override_settings(MIDDLEWARE=middleware, PROFILING_DIR=Path(self.directory.name),
+                                          PROFILING_INTERVAL=0.001)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+        self.staff = User.objects.create_user("staff", password="x", is_staff=True)
+        Genre.objects.create(name="Horror")
+
+    def profiles(self):
+        return sorted(Path(self.directory.name).glob("*.json"))
+
+    def test_staff_header_captures_profile_and_sql(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("genres"), HTTP_X_PROFILE="1")
+        name = response["X-Profile-Id"]
+        profile = json.loads(Path(self.directory.name, f"{name}.json").read_text())
+        self.assertEqual((profile["path"], profile["status"]), ("/genres/", 200))
+        self.assertTrue(any("core_genre" in query["sql"] for query in profile["queries"]))
+        download = self.client.get(reverse("profile_download", args=[name, "folded"]))
+        self.assertEqual(download.status_code, 200)
+        self.assertContains(self.client.get(reverse("profiles")), name)
+
+    def test_streamed_response_profiled_after_body(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("books"), {"stream": 1}, HTTP_X_PROFILE="1")
+        self.assertEqual(self.profiles(), [])
+        b"".join(response.streaming_content)
+        profile = json.loads(Path(self.directory.name, f"{response['X-Profile-Id']}.json").read_text())
+        self.assertTrue(any("core_cataloguerow" in query["sql"] for query in profile["queries"]))
+
+    def test_header_ignored_for_anonymous_requests(self):
+        response = self.client.get(reverse("genres"), HTTP_X_PROFILE="1")
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(self.profiles(), [])
+
+    def test_sampled_path(self):
+        with self.settings(PROFILING_SAMPLE_RATES={"/genres/": 1.0}):
+            self.client.get(reverse("genres"))
+            self.client.get(reverse("publishing"))
+        self.assertEqual(len(self.profiles()), 1)
+
+
+class ForecastPurchasesTest(TestCase):
+    def setUp(self):
+        self.reader = Reader.objects.create(surname="Doe", first_name="John", last_name="Smith",
+                                            email="john@email.com")
+        self.popular = Book.objects.create(title="It", isbn="9780670813025", year_published=1986,
+                                           available_copies=1, variety=Variety.PAPERBACK)
+        self.quiet = Book.objects.create(title="Misery", isbn="9780306406157", year_published=1987,
+                                         available_copies=10, variety=Variety.PAPERBACK)
+        today = timezone.localdate()
+        lendings = [Lending(book=self.popular, reader=self.reader, lending_date=today - timedelta(weeks=week))
+                    for week in range(8) for _ in range(3)]
+        lendings.append(Lending(book=self.quiet, reader=self.reader, lending_date=today))
+        lendings.append(Lending(book=self.quiet, reader=self.reader, lending_date=today - timedelta(weeks=80)))
+        Lending.objects.bulk_create(lendings)
+
+    def test_suggestions_for_books_short_of_demand(self):
+        call_command("forecast_purchases", stdout=StringIO())
+        suggestion = PurchaseSuggestion.objects.get()
+        self.assertEqual(suggestion.book, self.popular)
+        self.assertAlmostEqual(suggestion.weekly_forecast, 0.6 * 24 / 8 + 0.4 * 24 / 52)
+        self.assertAlmostEqual(suggestion.stockout_rate, 8 / 52)
+        self.assertEqual((suggestion.current_copies, suggestion.suggested_copies), (1, 7))
+
+    def test_rerun_replaces_suggestions(self):
+        call_command("forecast_purchases", stdout=StringIO())
+        self.popular.available_copies = 20
+        self.popular.total_copies = 20
+        self.popular.save()
+        call_command("forecast_purchases", stdout=StringIO())
+        self.assertFalse(PurchaseSuggestion.objects.exists())
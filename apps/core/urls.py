@@ -6,9 +6,24 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('about/', views.about_project, name='about_project'),
     path('books/', views.books, name='books'),
+    path('books/bulk/', views.books_bulk, name='books_bulk'),
+    path('books/isbn-lookup/', views.isbn_lookup, name='isbn_lookup'),
+    path('books/<int:book_id>/also-borrowed/', views.also_borrowed, name='also_borrowed'),
     path('authors/', views.authors, name='authors'),
+    path('authors/bulk/', views.authors_bulk, name='authors_bulk'),
+    path('authors/<int:author_id>/', views.author_detail, name='author_detail'),
+    path('authors/<int:author_id>/coauthors/', views.coauthor_network, name='coauthor_network'),
     path('readers/', views.readers, name='readers'),
+    path('readers/bulk/', views.readers_bulk, name='readers_bulk'),
+    path('readers/lookup/', views.reader_lookup, name='reader_lookup'),
     path('genres/', views.genres, name='genres'),
     path('publishing/', views.publishing, name='publishing'),
-    path('lend/', views.lend_page, name='lend')
+    path('lend/', views.lend_page, name='lend'),
+    path('lend/stream/', views.availability_stream, name='availability_stream'),
+    path('kiosk/', views.kiosk_search, name='kiosk_search'),
+    path('reports/circulation/', views.circulation_report, name='circulation_report'),
+    path('jobs/', views.jobs, name='jobs'),
+    path('jobs/<int:job_id>/', views.job_status, name='job_status'),
+    path('profiles/', views.profiles, name='profiles'),
+    path('profiles/<str:name>.<str:kind>', views.profile_download, name='profile_download'),
 ]
\ No newline at end of file
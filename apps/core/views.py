@@ -1,5 +1,88 @@
-from django.shortcuts import render, redirect
-from apps.core.models import Book, Variety, Gender, Reader, Author, Genre, Publishing, Lending
+import asyncio
+import json
+import mimetypes
+import os
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.views.decorators.csrf import csrf_exempt
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Lower, TruncMonth, TruncWeek
+from django.core.paginator import Paginator
+from django.shortcuts import get_object_or_404, render, redirect
+from django.template.loader import get_template, render_to_string
+from apps.core.catalogue import sync_catalogue_rows
+from apps.core.coauthors import coauthor_graph
+from apps.core.forms import (BULK_MAX_ROWS, AuthorBulkForm, BookBulkForm, BookBulkFormSet, BulkFormSet,
+                             ReaderBulkForm, ReaderBulkFormSet, bulk_formset)
+from apps.core.genres import genre_tree, subtree_ids
+from apps.core.inventory import event_buffer
+from apps.core.jobs import TASKS, enqueue
+from apps.core.isbn import normalize_isbn
+from apps.core.profiling import PROFILE_NAME_RE, list_profiles, profile_dir
+from apps.core.pubsub import AVAILABILITY_CHANNEL, get_broker
+from apps.core.snapshot import kiosk_snapshot
+from apps.core.storage import accepted_encodings, is_hashed_name
+from apps.core.phones import normalize_phone
+from apps.core.models import (Book, Variety, Gender, Reader, Author, Genre, Publishing, Lending, BookRecommendation,
+                              Branch, BranchHolding, CatalogueRow, CirculationRollup, AgeBand, InventoryEventKind,
+                              Job)
+
+ISBN_LOOKUP_LIMIT = 1000
+BULK_DEFAULT_ROWS = 10
+SSE_HEARTBEAT_SECONDS = 15
+STREAM_ROWS_MARKER = '<!-- stream-rows -->'
+STREAM_CHUNK_SIZE = 500
+JOB_PAGE_SIZE = 100
+AUTHOR_BOOKS_PER_PAGE = 25
+AUTHOR_COAUTHORS_SHOWN = 20
+COAUTHOR_MAX_HOPS = 3
+COAUTHOR_MAX_NODES = 500
+PROFILE_PAGE_SIZE = 100
+REPORT_PERIODS = {'month': TruncMonth, 'week': TruncWeek}
+REPORT_DIMENSIONS = {'genre': 'genre_id', 'publishing': 'publishing_id', 'age_band': 'age_band'}
+
+
+def stream_table(request, template_name, context, rows_template_name, rows):
+    page = render_to_string(template_name, {**context, "streaming": True}, request)
+    head, tail = page.split(STREAM_ROWS_MARKER, 1)
+    rows_template = get_template(rows_template_name)
+
+    def generate():
+        yield head
+        chunk = []
+        for row in rows.iterator(chunk_size=STREAM_CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield rows_template.render({"rows": chunk})
+                chunk = []
+        if chunk:
+            yield rows_template.render({"rows": chunk})
+        yield tail
+
+    # Under ASGI a sync iterator would be drained into a list before the
+    # first byte is sent, so fetch and render each chunk off the event loop.
+    async def agenerate():
+        render_rows = sync_to_async(rows_template.render)
+        yield head
+        chunk = []
+        async for row in rows.aiterator(chunk_size=STREAM_CHUNK_SIZE):
+            chunk.append(row)
+            if len(chunk) == STREAM_CHUNK_SIZE:
+                yield await render_rows({"rows": chunk})
+                chunk = []
+        if chunk:
+            yield await render_rows({"rows": chunk})
+        yield tail
+
+    content = agenerate() if isinstance(request, ASGIRequest) else generate()
+    return StreamingHttpResponse(content, content_type="text/html; charset=utf-8")
 
 
 # Create your views here.
@@ -21,8 +104,94 @@ def about_project(request):
     }
     return render(request, 'about.html', description)
 
+def split_author_name(name):
+    parts = name.split()
+    first_name = parts[0]
+    surname = " ".join(parts[1:]) if len(parts) > 1 else ""
+    return first_name, surname
+
+
+def bulk_entry(request, title, list_url_name, form_class, formset_class, save_rows, form_kwargs=None):
+    try:
+        rows = min(max(int(request.GET.get('rows', BULK_DEFAULT_ROWS)), 1), BULK_MAX_ROWS)
+    except ValueError:
+        rows = BULK_DEFAULT_ROWS
+    FormSet = bulk_formset(form_class, formset_class, rows)
+    message = ""
+    if request.method == 'POST':
+        formset = FormSet(request.POST, form_kwargs=form_kwargs or {})
+        if formset.is_valid():
+            filled = formset.filled_forms()
+            try:
+                with transaction.atomic():
+                    save_rows(filled)
+            except IntegrityError:
+                message = "Some rows conflict with existing records. Nothing was saved."
+            else:
+                messages.success(request, f"Saved {len(filled)} rows.")
+                return redirect(f"{request.path}?rows={rows}")
+    else:
+        formset = FormSet(form_kwargs=form_kwargs or {})
+    return render(request, 'core/bulk_entry.html', {
+        "title": title,
+        "formset": formset,
+        "rows": rows,
+        "list_url_name": list_url_name,
+        "message": message,
+    })
+
+
+def save_book_rows(forms):
+    books = []
+    for form in forms:
+        book = form.save(commit=False)
+        book.total_copies = book.available_copies
+        books.append(book)
+    Book.objects.bulk_create(books, batch_size=500)
+    names = {split_author_name(form.cleaned_data['author']) for form in forms if form.cleaned_data['author'].strip()}
+    authors = {name: Author.objects.get_or_create(first_name=name[0], surname=name[1])[0] for name in names}
+    links = [
+        Book.author.through(book_id=book.pk, author_id=authors[split_author_name(form.cleaned_data['author'])].pk)
+        for form, book in zip(forms, books) if form.cleaned_data['author'].strip()
+    ]
+    Book.author.through.objects.bulk_create(links, batch_size=500)
+    sync_catalogue_rows(book.pk for book in books)
+    for book in books:
+        if book.available_copies:
+            event_buffer.record_on_commit(book.pk, InventoryEventKind.ADJUST, book.available_copies)
+
+
+def save_simple_rows(model):
+    def save(forms):
+        model.objects.bulk_create([form.save(commit=False) for form in forms], batch_size=500)
+    return save
+
+
+def books_bulk(request):
+    form_kwargs = {
+        "genre_choices": list(Genre.objects.values_list('id', 'name')),
+        "publishing_choices": list(Publishing.objects.values_list('id', 'name')),
+    }
+    return bulk_entry(request, "Add Books", 'books', BookBulkForm, BookBulkFormSet, save_book_rows, form_kwargs)
+
+
+def readers_bulk(request):
+    return bulk_entry(request, "Add Readers", 'readers', ReaderBulkForm, ReaderBulkFormSet, save_simple_rows(Reader))
+
+
+def authors_bulk(request):
+    return bulk_entry(request, "Add Authors", 'authors', AuthorBulkForm, BulkFormSet, save_simple_rows(Author))
+
+
 def books(request):
+    message = ""
+    isbn = None
     if request.method == 'POST':
+        try:
+            isbn = normalize_isbn(request.POST.get('isbn', '').strip())
+        except ValidationError as error:
+            message = error.messages[0]
+    if isbn:
         genre_id = request.POST.get('genre_select')
         genre_name = request.POST.get('genre_new', '').strip()
         if genre_id:
@@ -39,90 +208,251 @@ def books(request):
             publishing, _ = Publishing.objects.get_or_create(name=pub_name)
         else:
             publishing = None
-        book = Book.objects.create(
-            title=request.POST.get('title', ''),
-            genre=genre,
-            publishing=publishing,
-            available_copies=int(request.POST.get('available_copies', 1)),
-            variety=request.POST.get('variety', None),
-            isbn=request.POST.get('isbn', '').strip() or None,
-            year_published=request.POST.get('year_published') or None,
-        )
-        author_name = request.POST.get('author', '').strip()
-        if author_name:
-            parts = author_name.split()
-            first_name = parts[0]
-            surname = " ".join(parts[1:]) if len(parts) > 1 else ""
-            author, _ = Author.objects.get_or_create(first_name=first_name, surname=surname)
-            book.author.add(author)
-    return render(
-        request,
-        'core/books.html',
-        {
-            "variety_choices": Variety.choices,
-            "book_list": Book.objects.all(),
-            "authors": Author.objects.all(),
-            "genres": Genre.objects.all(),
-            "publishings": Publishing.objects.all(),
-        }
+        try:
+            with transaction.atomic():
+                book = Book.objects.create(
+                    title=request.POST.get('title', ''),
+                    genre=genre,
+                    publishing=publishing,
+                    available_copies=int(request.POST.get('available_copies', 1)),
+                    variety=request.POST.get('variety', None),
+                    isbn=isbn,
+                    year_published=request.POST.get('year_published') or None,
+                )
+        except IntegrityError:
+            message = "A book with this ISBN already exists."
+        else:
+            author_name = request.POST.get('author', '').strip()
+            if author_name:
+                first_name, surname = split_author_name(author_name)
+                author, _ = Author.objects.get_or_create(first_name=first_name, surname=surname)
+                book.author.add(author)
+            return redirect('books')
+    query = request.GET.get('q', '').strip()
+    book_list = CatalogueRow.objects.order_by('book_id')
+    if query:
+        book_list = book_list.filter(Q(title__icontains=query) | Q(author_names__icontains=query))
+    genre_filter = request.GET.get('genre', '')
+    genres_in_tree = genre_tree(Genre.objects.all())
+    if genre_filter.isdigit():
+        book_list = book_list.filter(genre_id__in=subtree_ids(int(genre_filter)))
+    context = {
+        "query": query,
+        "genre_filter": genre_filter,
+        "variety_choices": Variety.choices,
+        "authors": Author.objects.all(),
+        "genres": genres_in_tree,
+        "publishings": Publishing.objects.all(),
+        "message": message,
+    }
+    if request.GET.get('stream'):
+        return stream_table(request, 'core/books.html', context, 'core/includes/book_rows.html', book_list)
+    return render(request, 'core/books.html', {**context, "book_list": book_list})
+
+
+@csrf_exempt
+def isbn_lookup(request):
+    if request.method == 'POST':
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON."}, status=400)
+        raw_isbns = payload.get('isbns', []) if isinstance(payload, dict) else payload
+    else:
+        raw_isbns = request.GET.getlist('isbn')
+    if not isinstance(raw_isbns, list) or not all(isinstance(raw, str) for raw in raw_isbns):
+        return JsonResponse({"error": "Expected a list of ISBNs."}, status=400)
+    if len(raw_isbns) > ISBN_LOOKUP_LIMIT:
+        return JsonResponse({"error": f"At most {ISBN_LOOKUP_LIMIT} ISBNs per request."}, status=400)
+
+    normalized = {}
+    for raw in raw_isbns:
+        try:
+            normalized[raw] = normalize_isbn(raw)
+        except ValidationError:
+            normalized[raw] = None
+    found = {
+        book['isbn']: book
+        for book in Book.objects.filter(isbn__in={isbn for isbn in normalized.values() if isbn})
+        .values('id', 'isbn', 'title', 'available_copies')
+    }
+    results = []
+    for raw in raw_isbns:
+        isbn = normalized[raw]
+        book = found.get(isbn)
+        results.append({
+            "input": raw,
+            "isbn": isbn,
+            "valid": isbn is not None,
+            "found": book is not None,
+            "book_id": book['id'] if book else None,
+            "title": book['title'] if book else None,
+            "available_copies": book['available_copies'] if book else 0,
+            "available": bool(book and book['available_copies'] > 0),
+        })
+    return JsonResponse({"results": results})
+
+
+def also_borrowed(request, book_id):
+    recommendations = (
+        BookRecommendation.objects
+        .filter(book_id=book_id)
+        .select_related('recommended')
+        .order_by('rank')
     )
+    return JsonResponse({
+        "book_id": book_id,
+        "also_borrowed": [
+            {
+                "book_id": r.recommended.id,
+                "title": r.recommended.title,
+                "score": r.score,
+                "available": r.recommended.available_copies > 0,
+            }
+            for r in recommendations
+        ],
+    })
 
 
 def readers(request):
+    message = ""
     if request.method == 'POST':
-        reader = Reader.objects.create(
-            surname=request.POST.get('surname', ''),
-            first_name=request.POST.get('first_name', ''),
-            last_name=request.POST.get('last_name', ''),
-            birth_date=request.POST.get('birth_date') or None,
-            email=request.POST.get('email', '').strip(),
-            gender=request.POST.get('gender', None),
-        )
-        print(reader)
-    return render(request, 'core/readers.html',
-                  {"gender_choices": Gender.choices, "readers": Reader.objects.all()})
+        try:
+            with transaction.atomic():
+                Reader.objects.create(
+                    surname=request.POST.get('surname', ''),
+                    first_name=request.POST.get('first_name', ''),
+                    last_name=request.POST.get('last_name', ''),
+                    birth_date=request.POST.get('birth_date') or None,
+                    email=request.POST.get('email', '').strip(),
+                    gender=request.POST.get('gender', None),
+                )
+        except IntegrityError:
+            message = "A reader with this email already exists."
+        else:
+            return redirect('readers')
+    context = {"gender_choices": Gender.choices, "message": message}
+    readers = Reader.objects.order_by('id')
+    if request.GET.get('stream'):
+        return stream_table(request, 'core/readers.html', context, 'core/includes/reader_rows.html', readers)
+    return render(request, 'core/readers.html', {**context, "readers": readers})
+
+def reader_lookup(request):
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({"error": "Provide a phone number or email in 'q'."}, status=400)
+    readers = Reader.objects.select_related('address').prefetch_related('phones')
+    if '@' in query:
+        readers = readers.alias(email_lower=Lower('email')).filter(email_lower=query.lower())
+    else:
+        readers = readers.filter(phones__phone_key=normalize_phone(query))
+    reader = readers.first()
+    if reader is None:
+        return JsonResponse({"error": "Reader not found."}, status=404)
+    address = getattr(reader, 'address', None)
+    return JsonResponse({
+        "id": reader.id,
+        "surname": reader.surname,
+        "first_name": reader.first_name,
+        "last_name": reader.last_name,
+        "email": reader.email,
+        "phones": [phone.phone for phone in reader.phones.all()],
+        "address": str(address) if address else None,
+    })
 
 def authors(request):
     if request.method == 'POST':
-        author = Author.objects.create(
+        Author.objects.create(
             surname=request.POST.get('surname', ''),
             first_name=request.POST.get('first_name', ''),
             last_name=request.POST.get('last_name', ''),
             birth_date=request.POST.get('birth_date') or None,
             gender=request.POST.get('gender', None),
         )
-        print(author)
+        return redirect('authors')
     return render(request, 'core/authors.html',
                   {"gender_choices": Gender.choices, "authors": Author.objects.all()})
 
+def author_detail(request, author_id):
+    author = get_object_or_404(Author, pk=author_id)
+    bibliography = CatalogueRow.objects.filter(book__author=author).order_by('year_published', 'title', 'book_id')
+    page = Paginator(bibliography, AUTHOR_BOOKS_PER_PAGE).get_page(request.GET.get('page'))
+    coauthors = author.coauthorships.select_related('coauthor').order_by('-book_count', 'coauthor_id')
+    return render(request, 'core/author_detail.html', {
+        "author": author,
+        "page": page,
+        "coauthors": coauthors[:AUTHOR_COAUTHORS_SHOWN],
+    })
+
+
+def coauthor_network(request, author_id):
+    author = get_object_or_404(Author, pk=author_id)
+    try:
+        hops = min(max(int(request.GET.get('hops', 1)), 1), COAUTHOR_MAX_HOPS)
+    except ValueError:
+        return JsonResponse({"error": "hops must be a number."}, status=400)
+    distance, edges = coauthor_graph(author.pk, hops, COAUTHOR_MAX_NODES)
+    names = {a.pk: f"{a.first_name} {a.surname}".strip() for a in Author.objects.filter(pk__in=distance)}
+    return JsonResponse({
+        "author": author.pk,
+        "hops": hops,
+        "truncated": len(distance) >= COAUTHOR_MAX_NODES,
+        "nodes": [{"id": pk, "name": names.get(pk, ""), "hops": hop} for pk, hop in sorted(distance.items())],
+        "edges": [{"source": a, "target": b, "books": books} for (a, b), books in sorted(edges.items())],
+    })
+
+
 def genres(request):
     if request.method == 'POST':
         name = request.POST.get('name')
-        if name:
-            Genre.objects.get_or_create(name=name)
+        try:
+            parent_id = int(request.POST['parent']) if request.POST.get('parent') else None
+            genre_id = int(request.POST['genre']) if request.POST.get('genre') else None
+        except ValueError:
+            return HttpResponseBadRequest("Invalid genre.")
+        if parent_id is not None and not Genre.objects.filter(pk=parent_id).exists():
+            return HttpResponseBadRequest("Unknown parent genre.")
+        if request.POST.get('action') == 'move':
+            genre = Genre.objects.filter(id=genre_id).first()
+            if genre:
+                genre.parent_id = parent_id
+                try:
+                    genre.save()
+                except ValidationError as error:
+                    messages.error(request, error.messages[0])
+        elif name:
+            Genre.objects.get_or_create(name=name, defaults={"parent_id": parent_id})
 
         return redirect('genres')
 
     return render(
         request,
         'core/genre.html',
-        {"genres": Genre.objects.all()}
+        {"genres": genre_tree(Genre.objects.select_related('parent'))}
     )
 
 def publishing(request):
     if request.method == 'POST':
-        publisher = Publishing.objects.create(
+        Publishing.objects.create(
             name=request.POST.get('name', ''),
             country=request.POST.get('country', ''),
             city=request.POST.get('city', ''),
         )
-        print(publisher)
     return render(request, 'core/publishing.html',
                   {"publishings": Publishing.objects.all()})
 
 
 def lend_page(request):
     message = ""
+    if "branch" in request.GET:
+        branch_param = request.GET["branch"]
+        if branch_param.isdigit():
+            request.session["branch_id"] = int(branch_param)
+        elif not branch_param:
+            request.session["branch_id"] = None
+    branch = None
+    if request.session.get("branch_id"):
+        branch = Branch.objects.filter(id=request.session["branch_id"]).first()
     if request.method == "POST":
         return_lending_id = request.POST.get("return_lending_id")
         if return_lending_id:
@@ -146,24 +476,181 @@ def lend_page(request):
                     reader = Reader.objects.get(id=reader_id)
                     book = Book.objects.get(id=book_id)
                     if book.available_copies > 0:
-                        Lending.objects.create(reader=reader, book=book)
+                        Lending.objects.create(reader=reader, book=book, branch=branch)
                         message = "Book successfully lent."
                     else:
                         message = "No available copies."
+                except ValidationError as error:
+                    message = error.messages[0]
 
                 except Reader.DoesNotExist:
                     message = "Selected reader not found."
                 except Book.DoesNotExist:
                     message = "Selected book not found."
     readers = Reader.objects.all()
-    books = Book.objects.filter(available_copies__gt=0)
-    lendings = Lending.objects.filter(returned=False)
+    if branch:
+        books = []
+        for holding in BranchHolding.objects.filter(branch=branch, available_copies__gt=0).select_related('book'):
+            holding.book.desk_available = holding.available_copies
+            books.append(holding.book)
+        lendings = Lending.objects.filter(branch=branch, returned=False)
+    else:
+        books = Book.objects.filter(available_copies__gt=0).annotate(desk_available=F('available_copies'))
+        lendings = Lending.objects.filter(returned=False)
     return render(request, "core/lend.html", {
         "readers": readers,
         "books": books,
-        "lendings": lendings,
+        "lendings": lendings.select_related('reader', 'book'),
+        "branches": Branch.objects.all(),
+        "branch": branch,
         "message": message
     })
 
 
+async def availability_events(subscription, branch_id=None, heartbeat=SSE_HEARTBEAT_SECONDS):
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await subscription.get(timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if branch_id is not None and json.loads(message)["branch_id"] != branch_id:
+                continue
+            yield f"event: availability\ndata: {message}\n\n"
+    finally:
+        subscription.close()
+
+
+async def availability_stream(request):
+    if not isinstance(request, ASGIRequest):
+        # A long-lived stream would pin a WSGI worker for as long as the page is open.
+        return HttpResponse("The availability stream requires an ASGI server.", status=501)
+    branch = request.GET.get('branch')
+    branch_id = int(branch) if branch and branch.isdigit() else None
+    subscription = get_broker().subscribe(AVAILABILITY_CHANNEL)
+    response = StreamingHttpResponse(
+        availability_events(subscription, branch_id), content_type='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def kiosk_search(request):
+    snapshot = kiosk_snapshot()
+    if snapshot is None:
+        return render(request, 'core/kiosk.html', {"message": "The catalogue is not available yet."}, status=503)
+    query = request.GET.get('q', '').strip()
+    return render(request, 'core/kiosk.html', {
+        "query": query,
+        "results": snapshot.search(query) if query else [],
+    })
+
+
+def circulation_report(request):
+    period = request.GET.get('period', 'month')
+    dimension = request.GET.get('by', 'genre')
+    if period not in REPORT_PERIODS:
+        period = 'month'
+    if dimension not in REPORT_DIMENSIONS:
+        dimension = 'genre'
+    column = REPORT_DIMENSIONS[dimension]
+    rows = list(
+        CirculationRollup.objects
+        .annotate(period=REPORT_PERIODS[period]('day'))
+        .values('period', column)
+        .annotate(opened=Sum('loans_opened'), closed=Sum('loans_closed'))
+        .order_by('-period', column)
+    )
+    if dimension == 'genre':
+        names = {pk: genre.name for pk, genre in Genre.objects.in_bulk({row[column] for row in rows}).items()}
+    elif dimension == 'publishing':
+        names = {pk: pub.name for pk, pub in Publishing.objects.in_bulk({row[column] for row in rows}).items()}
+    else:
+        names = dict(AgeBand.choices)
+    for row in rows:
+        row['label'] = names.get(row[column], 'Not specified')
+    return render(request, 'core/reports.html', {
+        "rows": rows,
+        "period": period,
+        "dimension": dimension,
+        "periods": REPORT_PERIODS,
+        "dimensions": REPORT_DIMENSIONS,
+    })
+
+
+@staff_member_required
+def jobs(request):
+    if request.method == 'POST':
+        task_name = request.POST.get('task', '')
+        if task_name in TASKS:
+            job = enqueue(task_name)
+            messages.success(request, f"Queued {task_name} as job #{job.pk}.")
+        else:
+            messages.error(request, "Unknown task.")
+        return redirect('jobs')
+    return render(request, 'core/jobs.html', {
+        "jobs": Job.objects.order_by('-pk')[:JOB_PAGE_SIZE],
+        "tasks": sorted(TASKS),
+    })
+
+
+@staff_member_required
+def job_status(request, job_id):
+    job = Job.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({"error": "Job not found."}, status=404)
+    return JsonResponse({
+        "id": job.pk,
+        "task": job.task,
+        "status": job.status,
+        "attempts": job.attempts,
+        "progress": job.progress,
+        "progress_total": job.progress_total,
+        "percent": job.percent,
+        "message": job.message,
+        "result": job.result,
+        "error": job.error,
+    })
+
+
+@staff_member_required
+def profiles(request):
+    return render(request, 'core/profiles.html', {"profiles": list_profiles(PROFILE_PAGE_SIZE)})
+
+
+@staff_member_required
+def profile_download(request, name, kind):
+    if not PROFILE_NAME_RE.match(name) or kind not in ('folded', 'json'):
+        raise Http404("Profile not found.")
+    path = profile_dir() / f"{name}.{kind}"
+    if not path.is_file():
+        raise Http404("Profile not found.")
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
+
 
+def static_asset(request, path):
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404("Invalid path.")
+    if not os.path.isfile(full_path):
+        raise Http404("Asset not found.")
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    accepts = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    served_path, encoding = full_path, None
+    for suffix, name in (('.br', 'br'), ('.gz', 'gzip')):
+        if accepts(name) and os.path.isfile(full_path + suffix):
+            served_path, encoding = full_path + suffix, name
+            break
+    response = FileResponse(open(served_path, 'rb'), content_type=content_type)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    if is_hashed_name(path):
+        response.headers['Cache-Control'] = f'public, max-age={settings.STATIC_MAX_AGE}, immutable'
+    else:
+        response.headers['Cache-Control'] = 'public, no-cache'
+    return response
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -72,17 +73,44 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
+# Small branch sites without a database server set LIBRARY_DATABASE=sqlite to
+# run on an embedded SQLite file in WAL mode. Write transactions start
+# IMMEDIATE so concurrent desks queue on the busy timeout instead of failing
+# on a lock upgrade.
+
+DATABASE_PROFILE = os.environ.get('LIBRARY_DATABASE', 'postgresql')
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'library_database',
-        'USER': 'postgres',
-        'PASSWORD': 'postgres',
-        'HOST': 'localhost',
-        'PORT': '5432',
+if DATABASE_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('LIBRARY_SQLITE_PATH', BASE_DIR / 'library.sqlite3'),
+            'OPTIONS': {
+                'timeout': 20,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': 'library_database',
+            'USER': 'postgres',
+            'PASSWORD': 'postgres',
+            'HOST': 'localhost',
+            'PORT': '5432',
+        }
     }
-}
 
 
 # Password validation
@@ -120,3 +148,134 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+STATICFILES_DIRS = [BASE_DIR / "static"]
+
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# With LIBRARY_STATIC_MANIFEST=1 (set it for collectstatic and for the
+# deployment serving the result) collectstatic writes content-hashed names
+# plus .gz (and .br when the brotli package is installed) next to each
+# compressible asset. Without it, as in development and test runs that have
+# no manifest, assets keep their source names.
+STATIC_MANIFEST = os.environ.get('LIBRARY_STATIC_MANIFEST', '').lower() in ('1', 'true', 'yes')
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": (
+            "apps.core.storage.CompressedManifestStaticFilesStorage" if STATIC_MANIFEST
+            else "django.contrib.staticfiles.storage.StaticFilesStorage"
+        ),
+    },
+}
+
+# Serve collected assets from Django itself (for deployments without a
+# separate web server) with far-future cache headers.
+SERVE_STATIC = False
+
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
+
+# Gzip HTML responses.
+COMPRESS_HTML = False
+
+if COMPRESS_HTML:
+    MIDDLEWARE.insert(0, 'django.middleware.gzip.GZipMiddleware')
+
+
+# Inventory event log
+# Borrow/return/adjust events are buffered in memory and written in batches
+# by a background thread. Set the interval to None to flush only when a batch fills.
+
+INVENTORY_EVENT_BATCH_SIZE = 500
+
+INVENTORY_EVENT_FLUSH_INTERVAL = 2.0
+
+
+# Reader lookup
+# Country code added to phone numbers entered without an international prefix.
+
+PHONE_DEFAULT_COUNTRY_CODE = ''
+
+
+# Live availability updates
+# Lend desks subscribe to borrow/return/adjust deltas over server-sent events
+# (served by the ASGI application). Point PUBSUB_BROKER at a class with the
+# same publish/subscribe interface to fan out through an external broker.
+
+PUBSUB_BROKER = 'apps.core.pubsub.InProcessBroker'
+
+PUBSUB_QUEUE_SIZE = 1000
+
+
+# Kiosk catalogue snapshots
+# Written by `manage.py export_catalogue` and searched by the kiosk view
+# through memory-mapped reads, without touching the database.
+
+CATALOGUE_SNAPSHOT_DIR = BASE_DIR / "snapshots"
+
+
+# Background jobs
+# Queued in the database and executed by `manage.py run_jobs`. Failed jobs are
+# retried with exponential backoff. Workers touch running jobs every
+# JOB_HEARTBEAT_INTERVAL seconds; jobs without a heartbeat for JOB_STALE_AFTER
+# seconds are requeued (or failed, once out of attempts) when a worker pool
+# starts and every JOB_STALE_AFTER / 4 seconds while it runs.
+
+JOB_WORKERS = 2
+
+JOB_POLL_INTERVAL = 2.0
+
+JOB_MAX_ATTEMPTS = 3
+
+JOB_RETRY_DELAY = 30
+
+JOB_HEARTBEAT_INTERVAL = 60
+
+JOB_STALE_AFTER = 60 * 60
+
+
+# View profiling
+# When enabled, requests from staff carrying the PROFILING_HEADER header, and a
+# random share of requests under each PROFILING_SAMPLE_RATES path prefix, are
+# profiled by sampling the request thread's stack every PROFILING_INTERVAL
+# seconds. The SQL the view ran is recorded too. Results go to PROFILING_DIR as
+# folded stacks (flamegraph.pl / speedscope input) and JSON, listed at
+# /profiles/. Enable with LIBRARY_PROFILING=1; when disabled the middleware is
+# not installed at all.
+
+PROFILING_ENABLED = os.environ.get('LIBRARY_PROFILING', '').lower() in ('1', 'true', 'yes')
+
+PROFILING_HEADER = 'X-Profile'
+
+PROFILING_SAMPLE_RATES = {}
+
+PROFILING_INTERVAL = 0.005
+
+PROFILING_MAX_QUERIES = 1000
+
+PROFILING_KEEP = 200
+
+PROFILING_DIR = BASE_DIR / "profiles"
+
+if PROFILING_ENABLED:
+    MIDDLEWARE.append('apps.core.profiling.ProfilingMiddleware')
+
+
+# Purchase forecasting
+# `manage.py forecast_purchases` blends the recent and long-run weekly loan
+# rates per book and suggests enough copies to cover FORECAST_LOAN_WEEKS of
+# demand plus a safety margin. The stock-out rate is the share of history
+# weeks whose new loans alone would have tied up every copy.
+
+FORECAST_HISTORY_WEEKS = 52
+
+FORECAST_RECENT_WEEKS = 8
+
+FORECAST_RECENT_WEIGHT = 0.6
+
+FORECAST_LOAN_WEEKS = 3
+
+FORECAST_SAFETY_FACTOR = 0.2
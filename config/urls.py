@@ -14,10 +14,18 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from apps.core import views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('apps.core.urls')),
 ]
+
+if settings.SERVE_STATIC:
+    urlpatterns.append(
+        re_path(rf'^{settings.STATIC_URL.lstrip("/")}(?P<path>.+)$', views.static_asset, name='static_asset')
+    )